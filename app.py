@@ -6,24 +6,156 @@ This module sets up and configures the Flask application with:
 - Logging
 - Error handling
 - CORS security
+- Response caching
 - RESTful API endpoints
 """
 
-from flask import Flask, request, jsonify, render_template, send_file
-from flask_cors import CORS
+from flask import Flask, request, jsonify, render_template
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
 import io
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from datetime import datetime
+from contextlib import contextmanager
 from functools import wraps
+from typing import Any, Optional
 import logging
 
+import numpy as np
+import orjson
+
+import matplotlib
+matplotlib.use('Agg')  # Render off-screen; never probe for a GUI backend
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
 from config import get_config
 from src.logger import LoggerFactory
-from src.transaction import Transaction
+from src.transaction import Transaction, TypeCode
 from src.storage import BudgetStorage
-from src.analytics import BudgetAnalytics
-from src.visualization import BudgetVisualizer
 from src.validators import TransactionValidator, QueryValidator, APIValidator
-from src.exceptions import ValidationException, StorageException
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that serializes responses with orjson."""
+    
+    mimetype = 'application/json'
+    
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        """Serialize objects orjson does not handle natively."""
+        if hasattr(obj, 'to_dict'):
+            return obj.to_dict()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string."""
+        return orjson.dumps(obj, default=self._default).decode()
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        """Deserialize data from a JSON string or bytes."""
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """Build a JSON response, writing orjson's bytes without re-encoding."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self._default), mimetype=self.mimetype
+        )
+
+
+# Methods advertised to CORS preflight requests on /api/ routes
+CORS_ALLOWED_METHODS = 'GET, POST, DELETE, OPTIONS'
+
+
+# Reusable figures, each already attached to an Agg canvas
+_figure_pool = queue.LifoQueue(maxsize=4)
+
+
+@contextmanager
+def borrow_figure(figsize):
+    """
+    Borrow a cleared figure from the pool, returning it when done.
+    
+    Args:
+        figsize: Figure size in inches (width, height)
+        
+    Yields:
+        Empty matplotlib Figure with an Agg canvas
+    """
+    try:
+        fig = _figure_pool.get_nowait()
+        fig.clear()
+    except queue.Empty:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+    fig.set_size_inches(figsize)
+    try:
+        yield fig
+    finally:
+        try:
+            _figure_pool.put_nowait(fig)
+        except queue.Full:
+            pass
+
+
+def render_expense_pie(expenses: dict) -> Optional[bytes]:
+    """
+    Render the expenses-by-category pie chart.
+    
+    Args:
+        expenses: Expense totals keyed by category
+        
+    Returns:
+        PNG image bytes, or None if there is nothing to plot
+    """
+    if not expenses:
+        return None
+    
+    img = io.BytesIO()
+    with borrow_figure((10, 6)) as fig:
+        ax = fig.subplots()
+        ax.pie(expenses.values(), labels=expenses.keys(), autopct='%1.1f%%', startangle=90)
+        ax.set_title("Expenses by Category", fontweight='bold')
+        fig.savefig(img, format='png', bbox_inches='tight', dpi=100)
+    return img.getvalue()
+
+
+def render_monthly_bar(months: list, income: np.ndarray,
+                       expenses: np.ndarray) -> Optional[bytes]:
+    """
+    Render the monthly income vs expenses bar chart.
+    
+    Args:
+        months: YYYY-MM labels in chronological order
+        income: Income total for each month
+        expenses: Expense total for each month
+        
+    Returns:
+        PNG image bytes, or None if there is nothing to plot
+    """
+    if not months:
+        return None
+    
+    x = np.arange(len(months))
+    width = 0.35
+    
+    img = io.BytesIO()
+    with borrow_figure((12, 6)) as fig:
+        ax = fig.subplots()
+        ax.bar(x - width/2, income, width, label='Income', color='green', alpha=0.7)
+        ax.bar(x + width/2, expenses, width, label='Expenses', color='red', alpha=0.7)
+        ax.set_xlabel('Month')
+        ax.set_ylabel('Amount ($)')
+        ax.set_title('Monthly Income vs Expenses', fontweight='bold')
+        ax.set_xticks(x)
+        ax.set_xticklabels(months, rotation=45, ha='right')
+        ax.legend()
+        ax.grid(axis='y', alpha=0.3)
+        fig.savefig(img, format='png', bbox_inches='tight', dpi=100)
+    return img.getvalue()
 
 
 def create_app(config_name: str = None) -> Flask:
@@ -37,6 +169,7 @@ def create_app(config_name: str = None) -> Flask:
         Configured Flask application instance
     """
     app = Flask(__name__, template_folder='templates', static_folder='static')
+    app.json = OrjsonProvider(app)
     
     # Load configuration
     config = get_config(config_name)
@@ -46,37 +179,92 @@ def create_app(config_name: str = None) -> Flask:
     logger = LoggerFactory.get_logger(
         'budget_tracker',
         log_file=config.LOG_FILE,
-        level=config.LOG_LEVEL
+        level=config.LOG_LEVEL,
+        file_level=config.LOG_FILE_LEVEL
     )
     app.logger = logger
     
-    # Setup CORS
-    CORS(app, resources={r"/api/*": {"origins": config.CORS_ALLOWED_ORIGINS}})
+    # Setup CORS (origins are resolved once, not per request)
+    allowed_origins = frozenset(origin.strip() for origin in config.CORS_ALLOWED_ORIGINS)
+    allow_any_origin = '*' in allowed_origins
     
-    # Add security headers
+    @app.before_request
+    def answer_preflight():
+        """Answer API preflight requests without dispatching to a view."""
+        if request.method == 'OPTIONS' and request.path.startswith('/api/'):
+            return app.response_class(status=204)
+    
+    # Add security and CORS headers
     @app.after_request
     def add_security_headers(response):
-        """Add security headers to all responses."""
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'SAMEORIGIN'
-        response.headers['X-XSS-Protection'] = '1; mode=block'
+        """Add security headers to all responses and CORS headers to API responses."""
+        headers = response.headers
+        headers['X-Content-Type-Options'] = 'nosniff'
+        headers['X-Frame-Options'] = 'SAMEORIGIN'
+        headers['X-XSS-Protection'] = '1; mode=block'
+        
+        if request.path.startswith('/api/'):
+            if allow_any_origin:
+                headers['Access-Control-Allow-Origin'] = '*'
+            else:
+                origin = request.headers.get('Origin')
+                headers.add('Vary', 'Origin')
+                if origin not in allowed_origins:
+                    return response
+                headers['Access-Control-Allow-Origin'] = origin
+            
+            if request.method == 'OPTIONS':
+                headers['Access-Control-Allow-Methods'] = CORS_ALLOWED_METHODS
+                requested_headers = request.headers.get('Access-Control-Request-Headers')
+                if requested_headers:
+                    headers['Access-Control-Allow-Headers'] = requested_headers
         return response
     
     # Initialize storage
     storage = BudgetStorage()
     
+    # Setup response cache
+    cache = Cache(app)
+    
+    # ==================== CACHING ====================
+    
+    def is_successful(response):
+        """Only cache successful responses."""
+        if isinstance(response, tuple):
+            return response[1] == 200
+        return response.status_code == 200
+    
+    def cached_by_version(*vary_on):
+        """
+        Decorator to cache a GET endpoint until the next mutation.
+        
+        Args:
+            vary_on: Names of query parameters that change the response
+        """
+        def make_cache_key(*args, **kwargs):
+            params = '&'.join(f"{name}={request.args.get(name, '')}" for name in vary_on)
+            return f"{request.path}?{params}:{storage.current_version()}"
+        
+        def decorator(f):
+            return cache.cached(
+                make_cache_key=make_cache_key,
+                response_filter=is_successful
+            )(f)
+        return decorator
+    
     # ==================== DECORATORS ====================
     
     def log_request(f):
         """Decorator to log API requests."""
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            app.logger.info(f"Request: {request.method} {request.path} from {request.remote_addr}")
+            if app.logger.isEnabledFor(logging.INFO):
+                app.logger.info("Request: %s %s from %s", request.method, request.path, request.remote_addr)
             try:
                 result = f(*args, **kwargs)
                 return result
             except Exception as e:
-                app.logger.error(f"Error in {f.__name__}: {str(e)}", exc_info=True)
+                app.logger.error("Error in %s: %s", f.__name__, e, exc_info=True)
                 raise
         return decorated_function
     
@@ -84,6 +272,7 @@ def create_app(config_name: str = None) -> Flask:
     
     @app.route('/api/transactions', methods=['GET'])
     @log_request
+    @cached_by_version('type', 'category')
     def get_transactions():
         """
         GET /api/transactions
@@ -109,18 +298,17 @@ def create_app(config_name: str = None) -> Flask:
             if not is_valid:
                 return jsonify({'error': error_msg}), 400
             
-            transactions = storage.get_all_transactions()
-            
-            if trans_type:
-                transactions = [t for t in transactions if t.trans_type == trans_type]
-            if category:
-                transactions = [t for t in transactions if t.category == category]
+            # Each row's JSON is encoded once and reused across listings
+            body = storage.query_json(
+                trans_type=trans_type or None,
+                category=category or None
+            )
             
-            app.logger.info(f"Retrieved {len(transactions)} transactions")
-            return jsonify([t.to_dict() for t in transactions]), 200
+            app.logger.info("Retrieved transactions (%s bytes)", len(body))
+            return app.response_class(body, mimetype='application/json'), 200
         
         except Exception as e:
-            app.logger.error(f"Error retrieving transactions: {str(e)}")
+            app.logger.error("Error retrieving transactions: %s", e)
             return jsonify({'error': 'Failed to retrieve transactions'}), 500
 
 
@@ -157,7 +345,7 @@ def create_app(config_name: str = None) -> Flask:
             # Validate transaction data
             is_valid, error_msg = TransactionValidator.validate_transaction(data)
             if not is_valid:
-                app.logger.warning(f"Validation failed: {error_msg}")
+                app.logger.warning("Validation failed: %s", error_msg)
                 return jsonify({'error': error_msg}), 400
             
             # Create transaction
@@ -171,7 +359,8 @@ def create_app(config_name: str = None) -> Flask:
             
             # Save transaction
             storage.add_transaction(transaction)
-            app.logger.info(f"Transaction created: {transaction.id}")
+            refresh_charts()
+            app.logger.info("Transaction created: %s", transaction.id)
             
             return jsonify({
                 'status': 'success',
@@ -180,10 +369,10 @@ def create_app(config_name: str = None) -> Flask:
             }), 201
         
         except ValueError as e:
-            app.logger.warning(f"Invalid transaction data: {str(e)}")
+            app.logger.warning("Invalid transaction data: %s", e)
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            app.logger.error(f"Error creating transaction: {str(e)}")
+            app.logger.error("Error creating transaction: %s", e)
             return jsonify({'error': 'Failed to create transaction'}), 500
 
 
@@ -206,17 +395,18 @@ def create_app(config_name: str = None) -> Flask:
             success = storage.delete_transaction(trans_id)
             
             if success:
-                app.logger.info(f"Transaction deleted: {trans_id}")
+                refresh_charts()
+                app.logger.info("Transaction deleted: %s", trans_id)
                 return jsonify({
                     'status': 'success',
                     'message': 'Transaction deleted successfully'
                 }), 200
             else:
-                app.logger.warning(f"Transaction not found: {trans_id}")
+                app.logger.warning("Transaction not found: %s", trans_id)
                 return jsonify({'error': 'Transaction not found'}), 404
         
         except Exception as e:
-            app.logger.error(f"Error deleting transaction: {str(e)}")
+            app.logger.error("Error deleting transaction: %s", e)
             return jsonify({'error': 'Failed to delete transaction'}), 500
 
     
@@ -224,40 +414,50 @@ def create_app(config_name: str = None) -> Flask:
     
     @app.route('/api/summary', methods=['GET'])
     @log_request
+    @cached_by_version('limit')
     def get_summary():
         """
         GET /api/summary
         
         Get complete budget summary and analytics.
         
+        Query Parameters:
+            limit: Only include the top N categories in each breakdown
+            
         Returns:
             Summary data including totals, breakdown by category, and monthly data
         """
         try:
-            transactions = storage.get_all_transactions()
-            analytics = BudgetAnalytics(transactions)
+            limit = request.args.get('limit', '').strip()
+            is_valid, error_msg = QueryValidator.validate_limit(limit)
+            if not is_valid:
+                return jsonify({'error': error_msg}), 400
+            limit = int(limit) if limit else None
+            
+            analytics = storage.get_analytics()
             
             summary = {
                 'total_income': analytics.get_total_income(),
                 'total_expense': analytics.get_total_expense(),
                 'balance': analytics.get_balance(),
-                'expenses_by_category': analytics.get_expenses_by_category(),
-                'income_by_category': analytics.get_income_by_category(),
+                'expenses_by_category': analytics.get_expenses_by_category(limit),
+                'income_by_category': analytics.get_income_by_category(limit),
                 'monthly_summary': analytics.get_monthly_summary(),
-                'transaction_count': len(transactions)
+                'transaction_count': len(analytics.transactions)
             }
             
             app.logger.info("Summary retrieved successfully")
             return jsonify(summary), 200
         
         except Exception as e:
-            app.logger.error(f"Error retrieving summary: {str(e)}")
+            app.logger.error("Error retrieving summary: %s", e)
             return jsonify({'error': 'Failed to retrieve summary'}), 500
 
 
     
     @app.route('/api/stats', methods=['GET'])
     @log_request
+    @cached_by_version()
     def get_stats():
         """
         GET /api/stats
@@ -268,10 +468,10 @@ def create_app(config_name: str = None) -> Flask:
             Quick statistics data
         """
         try:
-            transactions = storage.get_all_transactions()
-            analytics = BudgetAnalytics(transactions)
+            analytics = storage.get_analytics()
+            transactions = analytics.transactions
             
-            expense_count = len([t for t in transactions if t.trans_type == 'Expense'])
+            expense_count = sum(1 for t in transactions if t.type_code == TypeCode.EXPENSE)
             avg_expense = analytics.get_total_expense() / max(expense_count, 1)
             
             stats = {
@@ -280,13 +480,13 @@ def create_app(config_name: str = None) -> Flask:
                 'total_expense': analytics.get_total_expense(),
                 'balance': analytics.get_balance(),
                 'average_expense': round(avg_expense, 2),
-                'categories_count': len(analytics.get_expenses_by_category())
+                'categories_count': len(analytics.get_expenses_by_category(sort=False))
             }
             
             return jsonify(stats), 200
         
         except Exception as e:
-            app.logger.error(f"Error retrieving stats: {str(e)}")
+            app.logger.error("Error retrieving stats: %s", e)
             return jsonify({'error': 'Failed to retrieve stats'}), 500
 
     
@@ -303,13 +503,52 @@ def create_app(config_name: str = None) -> Flask:
         Returns:
             Dictionary of categories grouped by type
         """
-        return jsonify(Transaction.CATEGORIES), 200
+        return jsonify(dict(Transaction.CATEGORIES)), 200
 
     
     # ==================== CHART ENDPOINTS ====================
     
+    chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charts')
+    chart_lock = threading.Lock()
+    chart_builds = {}  # storage version -> Future of {chart name: PNG bytes}
+    
+    def build_charts(analytics):
+        """Render every dashboard chart from a snapshot of the analytics."""
+        return {
+            'expenses-pie': render_expense_pie(analytics.get_expenses_by_category()),
+            'monthly-bar': render_monthly_bar(*analytics.get_monthly_series())
+        }
+    
+    def refresh_charts():
+        """Start rendering charts for the current data in the background."""
+        # Read atomically so a concurrent write cannot pair old data with a new version
+        version, analytics = storage.get_versioned_analytics()
+        future = chart_executor.submit(build_charts, analytics)
+        with chart_lock:
+            # Renders for older data that have not started are no longer needed
+            for superseded in chart_builds.values():
+                superseded.cancel()
+            chart_builds.clear()
+            chart_builds[version] = future
+        return future
+    
+    def get_chart_png(name):
+        """Return pre-rendered PNG bytes for a chart, rendering if missing."""
+        while True:
+            version = storage.current_version()
+            with chart_lock:
+                future = chart_builds.get(version)
+            if future is None or (future.done() and not future.cancelled()
+                                  and future.exception() is not None):
+                future = refresh_charts()
+            try:
+                return future.result()[name]
+            except CancelledError:
+                continue  # Newer data arrived meanwhile; wait for its render
+    
     @app.route('/api/charts/expenses-pie', methods=['GET'])
     @log_request
+    @cached_by_version()
     def get_expense_pie_chart():
         """
         GET /api/charts/expenses-pie
@@ -320,34 +559,22 @@ def create_app(config_name: str = None) -> Flask:
             PNG image of pie chart
         """
         try:
-            transactions = storage.get_all_transactions()
-            analytics = BudgetAnalytics(transactions)
-            
-            expenses = analytics.get_expenses_by_category()
-            if not expenses:
+            png = get_chart_png('expenses-pie')
+            if png is None:
                 return jsonify({'error': 'No expense data available'}), 400
             
-            import matplotlib.pyplot as plt
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.pie(expenses.values(), labels=expenses.keys(), autopct='%1.1f%%', startangle=90)
-            ax.set_title("Expenses by Category", fontweight='bold')
-            
-            img = io.BytesIO()
-            plt.savefig(img, format='png', bbox_inches='tight', dpi=100)
-            img.seek(0)
-            plt.close()
-            
             app.logger.info("Pie chart generated successfully")
-            return send_file(img, mimetype='image/png', as_attachment=False)
+            return app.response_class(png, mimetype='image/png')
         
         except Exception as e:
-            app.logger.error(f"Error generating pie chart: {str(e)}")
+            app.logger.error("Error generating pie chart: %s", e)
             return jsonify({'error': 'Failed to generate chart'}), 500
 
 
     
     @app.route('/api/charts/monthly-bar', methods=['GET'])
     @log_request
+    @cached_by_version()
     def get_monthly_bar_chart():
         """
         GET /api/charts/monthly-bar
@@ -358,41 +585,15 @@ def create_app(config_name: str = None) -> Flask:
             PNG image of bar chart
         """
         try:
-            transactions = storage.get_all_transactions()
-            analytics = BudgetAnalytics(transactions)
-            monthly = analytics.get_monthly_summary()
-            
-            if not monthly:
+            png = get_chart_png('monthly-bar')
+            if png is None:
                 return jsonify({'error': 'No monthly data available'}), 400
             
-            import matplotlib.pyplot as plt
-            months = list(monthly.keys())
-            income = [monthly[m]['income'] for m in months]
-            expenses = [monthly[m]['expense'] for m in months]
-            
-            fig, ax = plt.subplots(figsize=(12, 6))
-            x = range(len(months))
-            width = 0.35
-            ax.bar([i - width/2 for i in x], income, width, label='Income', color='green', alpha=0.7)
-            ax.bar([i + width/2 for i in x], expenses, width, label='Expenses', color='red', alpha=0.7)
-            ax.set_xlabel('Month')
-            ax.set_ylabel('Amount ($)')
-            ax.set_title('Monthly Income vs Expenses', fontweight='bold')
-            ax.set_xticks(x)
-            ax.set_xticklabels(months, rotation=45, ha='right')
-            ax.legend()
-            ax.grid(axis='y', alpha=0.3)
-            
-            img = io.BytesIO()
-            plt.savefig(img, format='png', bbox_inches='tight', dpi=100)
-            img.seek(0)
-            plt.close()
-            
             app.logger.info("Monthly bar chart generated successfully")
-            return send_file(img, mimetype='image/png', as_attachment=False)
+            return app.response_class(png, mimetype='image/png')
         
         except Exception as e:
-            app.logger.error(f"Error generating bar chart: {str(e)}")
+            app.logger.error("Error generating bar chart: %s", e)
             return jsonify({'error': 'Failed to generate chart'}), 500
 
     
@@ -409,21 +610,21 @@ def create_app(config_name: str = None) -> Flask:
     @app.errorhandler(400)
     def bad_request(error):
         """Handle 400 Bad Request errors."""
-        app.logger.warning(f"Bad request: {error}")
+        app.logger.warning("Bad request: %s", error)
         return jsonify({'error': 'Bad request'}), 400
     
     
     @app.errorhandler(404)
     def not_found(error):
         """Handle 404 Not Found errors."""
-        app.logger.warning(f"Resource not found: {request.path}")
+        app.logger.warning("Resource not found: %s", request.path)
         return jsonify({'error': 'Resource not found'}), 404
     
     
     @app.errorhandler(500)
     def internal_error(error):
         """Handle 500 Internal Server errors."""
-        app.logger.error(f"Internal server error: {error}", exc_info=True)
+        app.logger.error("Internal server error: %s", error, exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
     
     
@@ -28,6 +28,10 @@ class Config:
     # CORS
     CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '*').split(',')
     
+    # Caching
+    CACHE_TYPE = 'SimpleCache'
+    CACHE_DEFAULT_TIMEOUT = 300
+    
     # Data
     DATA_DIR = os.getenv('DATA_DIR', 'data')
     DB_PATH = os.path.join(DATA_DIR, 'transactions.csv')
@@ -35,6 +39,7 @@ class Config:
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.path.join(DATA_DIR, 'app.log')
+    LOG_FILE_LEVEL = os.getenv('LOG_FILE_LEVEL')  # None: same as LOG_LEVEL
     LOG_MAX_BYTES = 10485760  # 10MB
     LOG_BACKUP_COUNT = 5
 
@@ -52,6 +57,8 @@ class ProductionConfig(Config):
     TESTING = False
     # In production, ensure SECRET_KEY is set via environment variable
     SECRET_KEY = os.getenv('SECRET_KEY', 'change-this-in-production')
+    # Only warnings and errors reach the log file
+    LOG_FILE_LEVEL = os.getenv('LOG_FILE_LEVEL', 'WARNING')
 
 
 class TestingConfig(Config):
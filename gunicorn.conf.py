@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for Budget Tracker.
+
+Gunicorn loads this file automatically when started from the project root.
+A single worker process serves requests from a pool of threads: every thread
+shares the worker's in-memory transactions, analytics and response caches,
+and threads blocked on I/O or on a background chart render do not hold up
+the other requests.
+"""
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = 120
@@ -1,9 +1,90 @@
 """Analytics and reporting for budget tracking"""
 
-from typing import List, Dict, Tuple
-from datetime import datetime
-from collections import defaultdict
-from .transaction import Transaction
+from typing import List, Dict, Tuple, Optional
+from operator import itemgetter
+import heapq
+import numpy as np
+from .transaction import Transaction, TypeCode, TYPE_CODES
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to plain NumPy reductions
+    njit = None
+
+
+# Integer codes used for the trans_type column
+_INCOME = int(TypeCode.INCOME)
+_EXPENSE = int(TypeCode.EXPENSE)
+
+
+def _reduce_numpy(amt, ttype, cat, month, n_cats, n_months):
+    """Compute all aggregates from the columnar arrays with NumPy reductions"""
+    income_mask = ttype == _INCOME
+    expense_mask = ttype == _EXPENSE
+    # Anything that is not income counts towards monthly expenses
+    other_mask = ~income_mask
+    
+    return (
+        amt[income_mask].sum(),
+        amt[expense_mask].sum(),
+        np.bincount(cat[income_mask], weights=amt[income_mask], minlength=n_cats),
+        np.bincount(cat[expense_mask], weights=amt[expense_mask], minlength=n_cats),
+        np.bincount(cat[income_mask], minlength=n_cats),
+        np.bincount(cat[expense_mask], minlength=n_cats),
+        np.bincount(month[income_mask], weights=amt[income_mask], minlength=n_months),
+        np.bincount(month[other_mask], weights=amt[other_mask], minlength=n_months),
+    )
+
+
+def _analytics_kernel(amt, ttype, cat, month, n_cats, n_months):
+    """Compute all aggregates from the columnar arrays in one compiled loop"""
+    income_total = 0.0
+    expense_total = 0.0
+    income_by_cat = np.zeros(n_cats)
+    expense_by_cat = np.zeros(n_cats)
+    income_cat_n = np.zeros(n_cats, dtype=np.int64)
+    expense_cat_n = np.zeros(n_cats, dtype=np.int64)
+    monthly_income = np.zeros(n_months)
+    monthly_expense = np.zeros(n_months)
+    
+    for i in range(amt.shape[0]):
+        amount = amt[i]
+        if ttype[i] == _INCOME:
+            income_total += amount
+            income_by_cat[cat[i]] += amount
+            income_cat_n[cat[i]] += 1
+            monthly_income[month[i]] += amount
+        else:
+            if ttype[i] == _EXPENSE:
+                expense_total += amount
+                expense_by_cat[cat[i]] += amount
+                expense_cat_n[cat[i]] += 1
+            monthly_expense[month[i]] += amount
+    
+    return (income_total, expense_total, income_by_cat, expense_by_cat,
+            income_cat_n, expense_cat_n, monthly_income, monthly_expense)
+
+
+if njit is not None:
+    _reduce_columns = njit(cache=True, fastmath=True)(_analytics_kernel)
+else:
+    _reduce_columns = _reduce_numpy
+
+
+def _largest_first(totals: Dict[str, float], limit: Optional[int] = None,
+                   sort: bool = True) -> Dict[str, float]:
+    """Order totals by amount, keeping only the top `limit` entries if given"""
+    if limit is not None:
+        # O(K log limit) instead of sorting every category
+        return dict(heapq.nlargest(limit, totals.items(), key=itemgetter(1)))
+    if not sort:
+        return dict(totals)
+    return dict(sorted(totals.items(), key=itemgetter(1), reverse=True))
+
+
+def _by_name(names: List[str], sums: np.ndarray, counts: np.ndarray) -> Dict[str, float]:
+    """Map per-code sums back to names, keeping only codes that occurred"""
+    return {names[i]: float(sums[i]) for i in np.flatnonzero(counts)}
 
 
 class BudgetAnalytics:
@@ -12,48 +93,180 @@ class BudgetAnalytics:
     def __init__(self, transactions: List[Transaction]):
         """Initialize with list of transactions"""
         self.transactions = transactions
+        self._computed_for = None
+    
+    @classmethod
+    def from_arrays(cls, amounts, types, categories, dates) -> "BudgetAnalytics":
+        """
+        Build analytics from parallel column arrays instead of Transaction objects.
+        
+        Args:
+            amounts: Amount of each transaction
+            types: 'Income' or 'Expense' for each transaction
+            categories: Category of each transaction
+            dates: Date (YYYY-MM-DD) of each transaction
+            
+        Returns:
+            BudgetAnalytics with every aggregate already computed
+        """
+        amt = np.asarray(amounts, dtype=np.float64)
+        types = np.asarray(types)
+        ttype = np.full(amt.shape[0], TypeCode.OTHER, dtype=np.int8)
+        for name, code in TYPE_CODES.items():
+            ttype[types == name] = code
+        
+        # Number categories in first-seen order, as _compute does
+        names, first_seen, inverse = np.unique(
+            np.asarray(categories, dtype=str), return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_seen)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0])
+        cat = rank[inverse].astype(np.int32)
+        
+        # datetime64[M] counts months from 1970-01; shift to the year-0 base of _compute
+        months = np.asarray(dates, dtype="datetime64[D]").astype("datetime64[M]")
+        absolute_months = (months.astype(np.int64) + 1970 * 12).astype(np.int32)
+        
+        analytics = cls([])
+        analytics._aggregate(amt, ttype, cat, names[order].tolist(), absolute_months)
+        analytics._computed_for = (id(analytics.transactions), 0)
+        return analytics
+    
+    def _compute(self) -> None:
+        """Build columnar arrays from the transactions and aggregate them"""
+        # Recompute only if the underlying list was swapped or resized
+        key = (id(self.transactions), len(self.transactions))
+        if self._computed_for == key:
+            return
+        
+        transactions = self.transactions
+        n = len(transactions)
+        
+        # Column-wise (SoA) view of the transactions so every aggregate is a
+        # vectorized reduction instead of a Python-level loop
+        cat_index: Dict[str, int] = {}
+        amt = np.fromiter((t.amount for t in transactions), dtype=np.float64, count=n)
+        ttype = np.fromiter((t.type_code for t in transactions), dtype=np.int8, count=n)
+        cat = np.fromiter(
+            (cat_index.setdefault(t.category, len(cat_index)) for t in transactions),
+            dtype=np.int32, count=n
+        )
+        month_keys = np.fromiter((t.month_key for t in transactions), dtype=np.int32, count=n)
+        absolute_months = (month_keys // 100) * 12 + (month_keys % 100 - 1)
+        
+        self._aggregate(amt, ttype, cat, list(cat_index), absolute_months)
+        self._computed_for = key
+    
+    def _aggregate(self, amt: np.ndarray, ttype: np.ndarray, cat: np.ndarray,
+                   categories: List[str], absolute_months: np.ndarray) -> None:
+        """
+        Compute every aggregate from the column arrays.
+        
+        Args:
+            amt: Amounts
+            ttype: TypeCode of each row
+            cat: Index into categories of each row
+            categories: Category names
+            absolute_months: year * 12 + month - 1 of each row
+        """
+        n = amt.shape[0]
+        self._amt = amt
+        self._ttype = ttype
+        self._cat = cat
+        self._categories = categories
+        
+        # Dense month index: months elapsed since the earliest month present,
+        # so per-month totals are plain histograms over 0..n_months-1
+        first_month = int(absolute_months.min()) if n else 0
+        self._month = absolute_months - first_month
+        n_months = int(self._month.max()) + 1 if n else 0
+        month_present = np.bincount(self._month, minlength=n_months)
+        # Formatted once per month rather than per transaction
+        self._months = [
+            f"{(first_month + i) // 12:04d}-{(first_month + i) % 12 + 1:02d}"
+            for i in range(n_months)
+        ]
+        
+        (income_total, expense_total,
+         income_by_cat, expense_by_cat, income_cat_n, expense_cat_n,
+         monthly_income, monthly_expense) = _reduce_columns(
+            self._amt, self._ttype, self._cat, self._month,
+            len(self._categories), len(self._months)
+        )
+        income_total = float(income_total)
+        expense_total = float(expense_total)
+        income_by_cat = _by_name(self._categories, income_by_cat, income_cat_n)
+        expense_by_cat = _by_name(self._categories, expense_by_cat, expense_cat_n)
+        # Months that have transactions, with their totals as parallel arrays
+        present = np.flatnonzero(month_present)
+        monthly_series = (
+            [self._months[i] for i in present],
+            monthly_income[present],
+            monthly_expense[present]
+        )
+        
+        self._income_total = income_total
+        self._expense_total = expense_total
+        self._income_by_cat = income_by_cat
+        self._expense_by_cat = expense_by_cat
+        self._monthly_series = monthly_series
     
     def get_total_income(self) -> float:
         """Calculate total income"""
-        return sum(t.amount for t in self.transactions if t.trans_type == "Income")
+        self._compute()
+        return self._income_total
     
     def get_total_expense(self) -> float:
         """Calculate total expenses"""
-        return sum(t.amount for t in self.transactions if t.trans_type == "Expense")
+        self._compute()
+        return self._expense_total
     
     def get_balance(self) -> float:
         """Calculate balance (income - expenses)"""
-        return self.get_total_income() - self.get_total_expense()
-    
-    def get_expenses_by_category(self) -> Dict[str, float]:
-        """Get total expenses grouped by category"""
-        expenses = defaultdict(float)
-        for t in self.transactions:
-            if t.trans_type == "Expense":
-                expenses[t.category] += t.amount
-        return dict(sorted(expenses.items(), key=lambda x: x[1], reverse=True))
-    
-    def get_income_by_category(self) -> Dict[str, float]:
-        """Get total income grouped by category"""
-        income = defaultdict(float)
-        for t in self.transactions:
-            if t.trans_type == "Income":
-                income[t.category] += t.amount
-        return dict(sorted(income.items(), key=lambda x: x[1], reverse=True))
+        self._compute()
+        return self._income_total - self._expense_total
     
-    def get_monthly_summary(self) -> Dict[str, Dict[str, float]]:
-        """Get monthly income and expenses breakdown"""
-        monthly = defaultdict(lambda: {"income": 0.0, "expense": 0.0})
+    def get_expenses_by_category(self, limit: Optional[int] = None,
+                                 sort: bool = True) -> Dict[str, float]:
+        """
+        Get total expenses grouped by category.
         
-        for t in self.transactions:
-            # Extract YYYY-MM from date
-            month = t.date[:7]
-            if t.trans_type == "Income":
-                monthly[month]["income"] += t.amount
-            else:
-                monthly[month]["expense"] += t.amount
+        Largest first, or in first-seen order when sort is False; `limit`
+        keeps only the top entries (always largest first).
+        """
+        self._compute()
+        return _largest_first(self._expense_by_cat, limit, sort)
+    
+    def get_income_by_category(self, limit: Optional[int] = None,
+                               sort: bool = True) -> Dict[str, float]:
+        """
+        Get total income grouped by category.
         
-        return dict(sorted(monthly.items()))
+        Largest first, or in first-seen order when sort is False; `limit`
+        keeps only the top entries (always largest first).
+        """
+        self._compute()
+        return _largest_first(self._income_by_cat, limit, sort)
+    
+    def get_monthly_series(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Get monthly income and expenses as parallel arrays.
+        
+        Returns:
+            (months, income, expense): YYYY-MM labels in chronological order
+            and NumPy arrays of the matching totals
+        """
+        self._compute()
+        return self._monthly_series
+    
+    def get_monthly_summary(self) -> Dict[str, Dict[str, float]]:
+        """Get monthly income and expenses breakdown"""
+        months, income, expense = self.get_monthly_series()
+        return {
+            month: {"income": inc, "expense": exp}
+            for month, inc, exp in zip(months, income.tolist(), expense.tolist())
+        }
     
     def get_summary_report(self) -> str:
         """Generate a text summary report"""
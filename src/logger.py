@@ -3,20 +3,33 @@ Logging configuration for Budget Tracker application.
 Provides centralized logging setup with file and console handlers.
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 from typing import Optional
 
 
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders a record's timestamp once, however many handlers format it."""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        asctime = record.__dict__.get('_asctime')
+        if asctime is None:
+            asctime = record._asctime = super().formatTime(record, datefmt)
+        return asctime
+
+
 class LoggerFactory:
     """Factory for creating and configuring loggers."""
     
     _loggers = {}
+    _listeners = []
     
     @classmethod
     def get_logger(cls, name: str, log_file: Optional[str] = None, 
-                   level: str = 'INFO') -> logging.Logger:
+                   level: str = 'INFO', file_level: Optional[str] = None) -> logging.Logger:
         """
         Get or create a logger with the specified configuration.
         
@@ -24,6 +37,7 @@ class LoggerFactory:
             name: Logger name
             log_file: Path to log file (optional)
             level: Logging level ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+            file_level: Minimum level written to the log file (defaults to level)
             
         Returns:
             Configured logger instance
@@ -33,20 +47,24 @@ class LoggerFactory:
         
         logger = logging.getLogger(name)
         logger.setLevel(getattr(logging, level))
+        # Records are fully handled here; don't format them again in ancestors
+        logger.propagate = False
         
         # Prevent duplicate handlers
         if logger.handlers:
             return logger
         
+        handlers = []
+        
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(getattr(logging, level))
-        console_formatter = logging.Formatter(
+        console_formatter = CachedTimeFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
         # File handler (if specified)
         if log_file:
@@ -56,13 +74,32 @@ class LoggerFactory:
                 maxBytes=10485760,  # 10MB
                 backupCount=5
             )
-            file_handler.setLevel(getattr(logging, level))
-            file_formatter = logging.Formatter(
+            file_handler.setLevel(getattr(logging, file_level or level))
+            file_formatter = CachedTimeFormatter(
                 '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
             file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        
+        # The logging call only enqueues the record; a background listener
+        # thread does the final formatting and the console/disk writes
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        listener.start()
+        cls._listeners.append(listener)
         
         cls._loggers[name] = logger
         return logger
+    
+    @classmethod
+    def shutdown(cls) -> None:
+        """Flush queued records and stop the background listener threads."""
+        while cls._listeners:
+            cls._listeners.pop().stop()
+
+
+atexit.register(LoggerFactory.shutdown)
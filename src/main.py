@@ -1,11 +1,24 @@
 """Main application with CLI interface for budget tracking"""
 
 import os
+import sys
 from typing import Optional
-from .transaction import Transaction, TransactionType
+from .transaction import Transaction, TransactionType, TypeCode
 from .storage import BudgetStorage
-from .analytics import BudgetAnalytics
-from .visualization import BudgetVisualizer
+
+try:
+    # Line editing and history for input() prompts where available (POSIX)
+    import readline  # noqa: F401
+except ImportError:
+    pass
+
+
+# Row layouts for transaction listings, parsed once rather than per row
+_ROW_FMT = "{:<12} {:<10} {:<15} {}${:<10.2f} {:<20}".format
+_NUMBERED_ROW_FMT = "{:<4} {:<12} {:<10} {:<15} {}${:<10.2f}".format
+
+# Erase the display and move the cursor home
+_CLEAR_SCREEN = "\x1b[2J\x1b[H"
 
 
 class BudgetTracker:
@@ -15,10 +28,14 @@ class BudgetTracker:
         """Initialize the budget tracker"""
         self.storage = BudgetStorage(data_path)
         self.data_path = data_path
+        if os.name == 'nt':
+            # Turns on ANSI escape handling in the Windows console
+            os.system('')
     
     def clear_screen(self) -> None:
-        """Clear terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """Clear terminal screen with an ANSI escape instead of spawning clear/cls"""
+        sys.stdout.write(_CLEAR_SCREEN)
+        sys.stdout.flush()
     
     def print_header(self, title: str) -> None:
         """Print a formatted header"""
@@ -93,9 +110,9 @@ class BudgetTracker:
         """View all transactions"""
         self.print_header("VIEW TRANSACTIONS")
         
-        transactions = self.storage.get_all_transactions()
+        transactions = self.storage.get_all_transactions_df()
         
-        if not transactions:
+        if transactions.empty:
             print("No transactions recorded yet.")
             input("\nPress Enter to continue...")
             return
@@ -110,14 +127,14 @@ class BudgetTracker:
         choice = input("\nSelect (1-4): ").strip()
         
         if choice == "2":
-            transactions = [t for t in transactions if t.trans_type == "Income"]
+            transactions = transactions.loc[transactions["Type"] == TransactionType.INCOME.value]
         elif choice == "3":
-            transactions = [t for t in transactions if t.trans_type == "Expense"]
+            transactions = transactions.loc[transactions["Type"] == TransactionType.EXPENSE.value]
         elif choice == "4":
             category = input("Enter category name: ").strip()
-            transactions = [t for t in transactions if t.category == category]
+            transactions = transactions.loc[transactions["Category"] == category]
         
-        if not transactions:
+        if transactions.empty:
             print("No transactions found.")
             input("\nPress Enter to continue...")
             return
@@ -126,24 +143,23 @@ class BudgetTracker:
         print(f"{'Date':<12} {'Type':<10} {'Category':<15} {'Amount':<12} {'Description':<20}")
         print("-"*69)
         
-        for t in transactions:
-            symbol = "+" if t.trans_type == "Income" else "-"
-            print(f"{t.date:<12} {t.trans_type:<10} {t.category:<15} {symbol}${t.amount:<10.2f} {t.description[:19]:<20}")
+        # Stream rows straight from the filtered columns; no Transaction objects
+        for t in transactions.itertuples(index=False):
+            symbol = "+" if t.Type == TransactionType.INCOME.value else "-"
+            print(_ROW_FMT(t.Date, t.Type, t.Category, symbol, t.Amount, t.Description[:19]))
         
         print(f"\nTotal: {len(transactions)} transaction(s)")
         input("\nPress Enter to continue...")
     
     def view_summary(self) -> None:
         """View budget summary"""
-        transactions = self.storage.get_all_transactions()
-        analytics = BudgetAnalytics(transactions)
+        analytics = self.storage.get_analytics()
         print(analytics.get_summary_report())
         input("Press Enter to continue...")
     
     def view_monthly_report(self) -> None:
         """View monthly breakdown"""
-        transactions = self.storage.get_all_transactions()
-        analytics = BudgetAnalytics(transactions)
+        analytics = self.storage.get_analytics()
         print(analytics.get_monthly_report())
         input("Press Enter to continue...")
     
@@ -151,13 +167,16 @@ class BudgetTracker:
         """View data visualizations"""
         self.print_header("DATA VISUALIZATION")
         
-        transactions = self.storage.get_all_transactions()
+        transactions = self.storage.get_all_transactions_df()
         
-        if not transactions:
+        if transactions.empty:
             print("No data to visualize. Add some transactions first.")
             input("\nPress Enter to continue...")
             return
         
+        # Imported on demand: matplotlib is slow to load and only charts need it
+        from .visualization import BudgetVisualizer
+        
         visualizer = BudgetVisualizer(transactions)
         
         print("Select chart type:")
@@ -195,19 +214,23 @@ class BudgetTracker:
             input("\nPress Enter to continue...")
             return
         
-        # Show recent transactions
-        print("Recent transactions:")
-        print(f"{'#':<4} {'Date':<12} {'Type':<10} {'Category':<15} {'Amount':<12}")
-        print("-"*53)
+        recent = transactions[-10:]
         
-        for i, t in enumerate(transactions[-10:], 1):
-            symbol = "+" if t.trans_type == "Income" else "-"
-            print(f"{i:<4} {t.date:<12} {t.trans_type:<10} {t.category:<15} {symbol}${t.amount:<10.2f}")
+        # Recent transactions and the prompt go out as one block in one input() call
+        lines = [
+            "Recent transactions:",
+            f"{'#':<4} {'Date':<12} {'Type':<10} {'Category':<15} {'Amount':<12}",
+            "-"*53
+        ]
+        for i, t in enumerate(recent, 1):
+            symbol = "+" if t.type_code == TypeCode.INCOME else "-"
+            lines.append(_NUMBERED_ROW_FMT(i, t.date, t.trans_type, t.category, symbol, t.amount))
+        lines.append("\nEnter transaction number to delete: ")
         
         try:
-            idx = int(input("\nEnter transaction number to delete: ").strip())
-            if 1 <= idx <= len(transactions[-10:]):
-                trans_to_delete = transactions[-10:][idx - 1]
+            idx = int(input("\n".join(lines)).strip())
+            if 1 <= idx <= len(recent):
+                trans_to_delete = recent[idx - 1]
                 confirm = input(f"Delete '{trans_to_delete.description}' for ${trans_to_delete.amount}? (y/n): ").strip().lower()
                 
                 if confirm == 'y':
@@ -2,12 +2,39 @@
 
 import os
 import csv
-from typing import List, Optional
-from .transaction import Transaction
+import tempfile
+import logging
+import threading
+import weakref
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple
+from .transaction import Transaction, parse_month_key
+
+
+# pandas dtypes for each CSV column, used by get_all_transactions_df
+CSV_DTYPES = {
+    "ID": "string",
+    "Date": "string",
+    "Type": "category",
+    "Category": "category",
+    "Amount": "float64",
+    "Description": "string"
+}
+
+# Child of the application logger, so warnings reach its handlers
+logger = logging.getLogger("budget_tracker.storage")
+
+# pyarrow is optional; when installed it parses large CSVs for get_all_transactions_df
+HAS_PYARROW = find_spec("pyarrow") is not None
 
 
 class BudgetStorage:
-    """Handles reading/writing transaction data to CSV"""
+    """Handles reading/writing transaction data to CSV (always UTF-8, whatever the locale)"""
+    
+    # Rewrite the CSV once deleted rows make up this fraction of it
+    COMPACT_THRESHOLD = 0.25
+    # CSVs at least this large are parsed with pyarrow's multithreaded reader
+    PYARROW_MIN_BYTES = 16 * 1024 * 1024
     
     def __init__(self, data_path: str = "data/transactions.csv"):
         """
@@ -17,6 +44,32 @@ class BudgetStorage:
             data_path: Path to CSV file for storing transactions
         """
         self.data_path = data_path
+        # Deleted IDs are appended here instead of rewriting the CSV
+        self.tombstone_path = os.path.splitext(data_path)[0] + ".tombstones"
+        # Bumped on every mutation so callers can cache derived data per version
+        self.version = 0
+        self._analytics = None
+        # In-memory mirror of the CSV, loaded on first access
+        self._transactions: Optional[List[Transaction]] = None
+        # Positions in self._transactions, keyed by ID, type, category and date
+        self._by_id: Dict[str, int] = {}
+        self._by_type: Dict[str, List[int]] = {}
+        self._by_category: Dict[str, List[int]] = {}
+        self._by_date: Dict[str, List[int]] = {}
+        # IDs still present in the CSV but deleted via the tombstone file
+        self._tombstones: Set[str] = set()
+        # Encoded JSON object per transaction ID, filled in by query_json
+        self._json_rows: Dict[str, bytes] = {}
+        # (inode, mtime_ns, size) of the CSV and tombstone file when last read/written
+        self._signature: Optional[Tuple] = None
+        # Column-wise copy of the CSV and the file signature it was read at
+        self._df = None
+        self._df_signature: Optional[Tuple] = None
+        # Append-mode handle on the CSV, kept open between adds, and the finalizer
+        # that closes it at exit or when this storage is garbage collected
+        self._append_file = None
+        self._append_closer: Optional[weakref.finalize] = None
+        self._lock = threading.RLock()
         self._ensure_file_exists()
     
     def _ensure_file_exists(self) -> None:
@@ -24,73 +77,457 @@ class BudgetStorage:
         os.makedirs(os.path.dirname(self.data_path) or ".", exist_ok=True)
         
         if not os.path.exists(self.data_path):
-            with open(self.data_path, "w", newline="") as f:
+            with open(self.data_path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
                 writer.writerow(["ID", "Date", "Type", "Category", "Amount", "Description"])
     
     def add_transaction(self, transaction: Transaction) -> None:
         """Add transaction to storage"""
-        with open(self.data_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            parts = transaction.to_csv_row().split(",")
-            writer.writerow(parts)
+        self.add_transactions((transaction,))
+    
+    def add_transactions(self, transactions: Iterable[Transaction]) -> None:
+        """
+        Add several transactions with a single write to the CSV.
+        
+        Args:
+            transactions: Transactions to append, in order
+        """
+        transactions = list(transactions)
+        with self._lock:
+            # Pick up changes made by other processes before appending
+            loaded = self._load()
+            csv_before, tombstones_before = self._signature
+            payload = "".join(t.to_csv_line() for t in transactions)
+            self._appender().write(payload)
+            self.flush()
+            
+            signature = self._file_signature()
+            csv_after, tombstones_after = signature
+            expected_size = (csv_before[2] if csv_before else 0) + len(payload.encode("utf-8"))
+            if (csv_after is None or csv_before is None or csv_after[0] != csv_before[0]
+                    or csv_after[2] != expected_size or tombstones_after != tombstones_before):
+                # Someone else wrote since _load(); re-read rather than mark
+                # their changes as seen without ever loading them
+                self._signature = None
+                self._load()
+                return
+            
+            for trans in transactions:
+                self._index(trans, len(loaded))
+                loaded.append(trans)
+            self._mark_changed()
+            self._signature = signature
+    
+    def _appender(self) -> TextIO:
+        """Get the append handle on the CSV, opening it on first use"""
+        if self._append_file is None:
+            # Large buffer so a whole batch usually reaches the file in one write
+            self._append_file = open(
+                self.data_path, "a", newline="", encoding="utf-8", buffering=1 << 20
+            )
+            # Refers to the handle only, so it does not keep this storage alive
+            self._append_closer = weakref.finalize(self, self._append_file.close)
+        return self._append_file
+    
+    def flush(self) -> None:
+        """Push rows written through the append handle to the file"""
+        with self._lock:
+            if self._append_file is not None:
+                self._append_file.flush()
+    
+    def close(self) -> None:
+        """Close the append handle; the next add reopens it"""
+        with self._lock:
+            if self._append_closer is not None:
+                self._append_closer()  # Closes the handle and retires the finalizer
+                self._append_closer = None
+                self._append_file = None
+    
+    def _mark_changed(self) -> None:
+        """Record a mutation and drop data derived from the old contents"""
+        self.version += 1
+        self._analytics = None
+    
+    def _index(self, transaction: Transaction, position: int) -> None:
+        """Add a transaction at the given position to the lookup indices"""
+        self._by_id[transaction.id] = position
+        self._by_type.setdefault(transaction.trans_type, []).append(position)
+        self._by_category.setdefault(transaction.category, []).append(position)
+        self._by_date.setdefault(transaction.date, []).append(position)
+    
+    def _set_transactions(self, transactions: List[Transaction]) -> None:
+        """Replace the in-memory transactions and rebuild the indices"""
+        self._transactions = transactions
+        self._by_id = {}
+        self._by_type = {}
+        self._by_category = {}
+        self._by_date = {}
+        for position, trans in enumerate(transactions):
+            self._index(trans, position)
+    
+    def _file_signature(self) -> Tuple:
+        """Stat the CSV and tombstone file to detect changes made elsewhere"""
+        signature = []
+        for path in (self.data_path, self.tombstone_path):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _load(self) -> List[Transaction]:
+        """
+        Get the in-memory transactions.
+        
+        The CSV is parsed on first use and again only when its inode, mtime or size
+        (or the tombstone file's) no longer match what this instance last saw,
+        e.g. after another process or worker wrote to it.
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if self._transactions is None or signature != self._signature:
+                if self._transactions is not None:
+                    self._mark_changed()
+                # The file may have been replaced; append to the new one
+                self.close()
+                self._json_rows = {}
+                self._tombstones = self._read_tombstones()
+                self._set_transactions(self._read_all_transactions())
+                self._signature = signature
+            return self._transactions
+    
+    def current_version(self) -> int:
+        """Get the data version, first reloading if the files changed on disk"""
+        with self._lock:
+            self._load()
+            return self.version
+    
+    def get_analytics(self) -> "BudgetAnalytics":
+        """Get analytics for the current transactions, rebuilt only after mutations"""
+        # Imported here so the storage layer alone does not pull in NumPy
+        from .analytics import BudgetAnalytics
+        
+        with self._lock:
+            transactions = self._load()
+            analytics = self._analytics
+            if analytics is None:
+                analytics = self._analytics = BudgetAnalytics(list(transactions))
+            return analytics
+    
+    def get_versioned_analytics(self) -> Tuple[int, "BudgetAnalytics"]:
+        """Get the data version together with the analytics built for it"""
+        with self._lock:
+            analytics = self.get_analytics()
+            return self.version, analytics
     
     def get_all_transactions(self) -> List[Transaction]:
         """Retrieve all transactions"""
+        with self._lock:
+            return list(self._load())
+    
+    def get_all_transactions_df(self) -> "pd.DataFrame":
+        """
+        Retrieve all transactions as a DataFrame, one column per CSV field.
+        
+        Parsed by pandas' C reader without building Transaction objects and
+        cached until the files change. The frame is shared between callers,
+        so treat it as read-only.
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if self._df is None or signature != self._df_signature:
+                self._df = self._read_transactions_df()
+                self._df_signature = signature
+            return self._df
+    
+    def _read_transactions_df(self) -> "pd.DataFrame":
+        """Parse every live (non-deleted) transaction from the CSV into columns"""
+        # Imported here so storage users that never ask for a frame skip pandas
+        import pandas as pd
+        
+        if HAS_PYARROW and os.path.getsize(self.data_path) >= self.PYARROW_MIN_BYTES:
+            # Arrow tokenizes on several threads; worth its startup on big files
+            options = {"engine": "pyarrow"}
+        else:
+            # memory_map lets the C parser tokenize the mapped file directly
+            # instead of copying it through Python's buffered I/O first
+            options = {"memory_map": True}
+        try:
+            df = pd.read_csv(
+                self.data_path, dtype=CSV_DTYPES, keep_default_na=False,
+                encoding="utf-8", **options
+            )
+        except ValueError as e:
+            # A non-numeric amount or a row with extra fields fails the whole
+            # read; build the frame from the rows get_all_transactions keeps
+            logger.warning("Falling back to row-by-row parsing of %s: %s", self.data_path, e)
+            return pd.DataFrame.from_records(
+                [trans.to_csv_fields() for trans in self._load()], columns=list(CSV_DTYPES)
+            ).astype(CSV_DTYPES)
+        
+        df["Description"] = df["Description"].fillna("")
+        live = ~df["ID"].isin(self._read_tombstones())
+        
+        # Drop the rows Transaction would reject, as _read_all_transactions does;
+        # dates repeat a lot, so each distinct one is checked once
+        dates = df["Date"].fillna("")
+        valid_dates = []
+        for date in dates.unique():
+            try:
+                parse_month_key(date)
+            except ValueError:
+                continue
+            valid_dates.append(date)
+        valid = dates.isin(valid_dates) & (df["Amount"] >= 0)
+        malformed = int((live & ~valid).sum())
+        if malformed:
+            logger.warning("Skipping %d malformed rows in %s", malformed, self.data_path)
+        keep = live & valid
+        if not keep.all():
+            df = df.loc[keep].reset_index(drop=True)
+        return df
+    
+    def _read_tombstones(self) -> Set[str]:
+        """Read the IDs of deleted transactions not yet compacted away"""
+        try:
+            with open(self.tombstone_path, "r", encoding="utf-8") as f:
+                return {line.strip() for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+    
+    def _read_all_transactions(self) -> List[Transaction]:
+        """Parse every live (non-deleted) transaction from the CSV file"""
+        tombstones = self._tombstones
         transactions = []
         try:
-            with open(self.data_path, "r") as f:
+            with open(self.data_path, "r", encoding="utf-8") as f:
                 reader = csv.reader(f)
                 next(reader)  # Skip header
                 for row in reader:
-                    if row:  # Skip empty rows
-                        trans = Transaction(
-                            amount=float(row[4]),
-                            trans_type=row[2],
-                            category=row[3],
-                            description=row[5] if len(row) > 5 else "",
-                            date=row[1]
-                        )
-                        trans.id = row[0]
+                    if row and row[0] not in tombstones:  # Skip empty and deleted rows
+                        try:
+                            trans = Transaction(
+                                amount=float(row[4]),
+                                trans_type=row[2],
+                                category=row[3],
+                                description=row[5] if len(row) > 5 else "",
+                                date=row[1],
+                                trans_id=row[0]
+                            )
+                        except (ValueError, IndexError) as e:
+                            # One bad (e.g. hand-edited) row must not make the whole file unreadable
+                            logger.warning("Skipping malformed row %d in %s: %s",
+                                           reader.line_num, self.data_path, e)
+                            continue
                         transactions.append(trans)
         except FileNotFoundError:
             pass
         return transactions
     
+    def query(self, trans_type: Optional[str] = None,
+              category: Optional[str] = None,
+              date: Optional[str] = None) -> List[Transaction]:
+        """
+        Get transactions matching every given filter, in storage order.
+        
+        Args:
+            trans_type: Only include this transaction type
+            category: Only include this category
+            date: Only include this date (YYYY-MM-DD)
+        
+        Returns:
+            Matching transactions
+        """
+        with self._lock:
+            transactions = self._load()
+            matches = [
+                index.get(value, [])
+                for index, value in ((self._by_type, trans_type),
+                                     (self._by_category, category),
+                                     (self._by_date, date))
+                if value is not None
+            ]
+            if not matches:
+                return list(transactions)
+            
+            positions = matches[0]
+            if len(matches) > 1:
+                positions = sorted(set(positions).intersection(*matches[1:]))
+            return [transactions[i] for i in positions]
+    
+    def query_json(self, trans_type: Optional[str] = None,
+                   category: Optional[str] = None,
+                   date: Optional[str] = None) -> bytes:
+        """
+        Get the transactions query() would return, encoded as a JSON array.
+        
+        Each transaction is encoded once and its bytes reused by later listings
+        until it is deleted or the file is reloaded. Like the lookup indices,
+        this relies on stored transactions not being modified in place.
+        """
+        # Imported here so storage users that never list JSON skip orjson
+        import orjson
+        
+        with self._lock:
+            rows = self._json_rows
+            encoded = []
+            for trans in self.query(trans_type, category, date):
+                row = rows.get(trans.id)
+                if row is None:
+                    row = rows[trans.id] = orjson.dumps(trans.to_dict())
+                encoded.append(row)
+            return b"[" + b",".join(encoded) + b"]"
+    
     def get_transactions_by_type(self, trans_type: str) -> List[Transaction]:
         """Get transactions filtered by type"""
-        return [t for t in self.get_all_transactions() if t.trans_type == trans_type]
+        return self.query(trans_type=trans_type)
     
     def get_transactions_by_category(self, category: str) -> List[Transaction]:
         """Get transactions filtered by category"""
-        return [t for t in self.get_all_transactions() if t.category == category]
+        return self.query(category=category)
     
     def get_transactions_by_date(self, date: str) -> List[Transaction]:
         """Get transactions for a specific date"""
-        return [t for t in self.get_all_transactions() if t.date == date]
+        return self.query(date=date)
     
     def delete_transaction(self, trans_id: str) -> bool:
-        """Delete transaction by ID"""
-        transactions = self.get_all_transactions()
-        filtered = [t for t in transactions if t.id != trans_id]
+        """
+        Delete transaction by ID.
+        
+        The ID is appended to the tombstone file; the CSV itself is only
+        rewritten once enough rows are deleted (see _maybe_compact).
+        """
+        with self._lock:
+            transactions = self._load()
+            position = self._by_id.get(trans_id)
+            if position is None:
+                return False  # Transaction not found
+            
+            csv_before, tombstones_before = self._signature
+            line = f"{trans_id}\n"
+            with open(self.tombstone_path, "a", newline="", encoding="utf-8") as f:
+                f.write(line)
+            
+            signature = self._file_signature()
+            csv_after, tombstones_after = signature
+            expected_size = (tombstones_before[2] if tombstones_before else 0) + len(line.encode("utf-8"))
+            if (csv_after != csv_before or tombstones_after is None
+                    or (tombstones_before is not None and tombstones_after[0] != tombstones_before[0])
+                    or tombstones_after[2] != expected_size):
+                # Someone else wrote since _load(); re-read, as add_transactions does
+                self._signature = None
+                self._load()
+            else:
+                self._tombstones.add(trans_id)
+                self._json_rows.pop(trans_id, None)
+                self._set_transactions(transactions[:position] + transactions[position + 1:])
+                self._mark_changed()
+                self._signature = signature
+            self._maybe_compact()
+            return True
+    
+    def _maybe_compact(self) -> None:
+        """Rewrite the CSV without deleted rows once they pass COMPACT_THRESHOLD"""
+        deleted = len(self._tombstones)
+        if deleted <= self.COMPACT_THRESHOLD * (deleted + len(self._transactions)):
+            return
+        self._compact()
+    
+    def _compact(self) -> None:
+        """
+        Rewrite the CSV without its tombstoned rows.
+        
+        Rows are copied from the file on disk rather than written from memory,
+        so rows this instance could not parse are kept as they are. If the CSV
+        changes while the copy is made (e.g. another worker appended), the copy
+        is discarded and compaction is left to a later delete. Tombstones
+        written by others in the meantime stay in the tombstone file.
+        """
+        self.close()
+        start = self._file_signature()
+        tombstones = self._read_tombstones()
+        with open(self.data_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip header
+            tmp_path = self._write_temp_csv(
+                row for row in reader if row and row[0] not in tombstones
+            )
         
-        if len(filtered) == len(transactions):
-            return False  # Transaction not found
+        try:
+            if self._file_signature()[0] != start[0]:
+                os.remove(tmp_path)
+                return
+            os.replace(tmp_path, self.data_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         
-        self._write_all_transactions(filtered)
-        return True
+        if self._read_tombstones() == tombstones:
+            self._clear_tombstones()
+            if start == self._signature:
+                self._signature = self._file_signature()
+                return
+        # Others deleted (or changed the files) meanwhile; the IDs left in the
+        # tombstone file no longer match rows but are harmless until next time
+        self._signature = None
+        self._load()
+    
+    def _clear_tombstones(self) -> None:
+        """Forget deleted IDs once their rows are gone from the CSV"""
+        self._tombstones = set()
+        try:
+            os.remove(self.tombstone_path)
+        except FileNotFoundError:
+            pass
+    
+    def _write_temp_csv(self, rows: Iterable[Iterable]) -> str:
+        """
+        Write the header and rows to a new file beside the CSV and fsync it.
+        
+        The file gets a unique name, so workers rewriting the CSV at the same
+        time never share one; it is removed again if writing fails.
+        
+        Returns:
+            Path of the temporary file
+        """
+        fd, tmp_path = tempfile.mkstemp(
+            suffix=".tmp", dir=os.path.dirname(self.data_path) or "."
+        )
+        try:
+            with open(fd, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["ID", "Date", "Type", "Category", "Amount", "Description"])
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
     
     def _write_all_transactions(self, transactions: List[Transaction]) -> None:
-        """Overwrite all transactions (used for delete operations)"""
-        with open(self.data_path, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["ID", "Date", "Type", "Category", "Amount", "Description"])
-            for trans in transactions:
-                parts = trans.to_csv_row().split(",")
-                writer.writerow(parts)
+        """
+        Overwrite all transactions.
+        
+        The rows go to a temporary file that then atomically replaces the
+        CSV, so a crash mid-write leaves the previous contents intact.
+        """
+        self.close()
+        tmp_path = self._write_temp_csv(trans.to_csv_fields() for trans in transactions)
+        try:
+            os.replace(tmp_path, self.data_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
     
     def clear_all(self) -> None:
         """Clear all transactions (for testing)"""
-        with open(self.data_path, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["ID", "Date", "Type", "Category", "Amount", "Description"])
+        with self._lock:
+            self._write_all_transactions([])
+            self._clear_tombstones()
+            self._json_rows = {}
+            self._set_transactions([])
+            self._mark_changed()
+            self._signature = self._file_signature()
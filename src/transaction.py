@@ -5,10 +5,14 @@ This module provides the Transaction class for representing individual financial
 transactions and managing their data.
 """
 
-from datetime import datetime
-from enum import Enum
-from typing import Optional, Dict, List
-import uuid
+from datetime import datetime, timedelta
+from enum import Enum, IntEnum
+from itertools import count
+from types import MappingProxyType
+from typing import Optional, Dict, Mapping, Tuple
+import os
+import re
+import time
 
 
 class TransactionType(Enum):
@@ -17,6 +21,62 @@ class TransactionType(Enum):
     EXPENSE = "Expense"
 
 
+class TypeCode(IntEnum):
+    """Compact integer codes for transaction types, cheap to compare and vectorize."""
+    INCOME = 0
+    EXPENSE = 1
+    OTHER = 2
+
+
+TYPE_CODES: Dict[str, TypeCode] = {
+    TransactionType.INCOME.value: TypeCode.INCOME,
+    TransactionType.EXPENSE.value: TypeCode.EXPENSE
+}
+
+# Per-process sequence number that keeps IDs unique within one clock tick
+_id_counter = count()
+
+# Characters that force a CSV field to be quoted (csv.QUOTE_MINIMAL rules)
+_needs_quoting = re.compile(r'[,"\r\n]').search
+
+
+def _csv_field(value: str) -> str:
+    """Quote a text field for CSV output the way csv.writer would"""
+    if _needs_quoting(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+# Today's date (YYYY-MM-DD) and the epoch time of the next local midnight
+_today_cache: Tuple[str, float] = ("", 0.0)
+
+
+def _today() -> str:
+    """Get today's date as YYYY-MM-DD, formatted once per day"""
+    global _today_cache
+    today, expires = _today_cache
+    now = time.time()
+    if now >= expires:
+        current = datetime.fromtimestamp(now)
+        today = current.strftime("%Y-%m-%d")
+        midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        _today_cache = (today, midnight.timestamp())
+    return today
+
+
+def parse_month_key(date: str) -> int:
+    """
+    Get the month of a YYYY-MM-DD date as an integer YYYYMM.
+    
+    Raises:
+        ValueError: If the year or month is not a number
+    """
+    try:
+        return int(date[:4]) * 100 + int(date[5:7])
+    except ValueError:
+        raise ValueError(f"Invalid date: {date}")
+
+
 class Transaction:
     """
     Represents a single financial transaction.
@@ -24,16 +84,30 @@ class Transaction:
     Attributes:
         id: Unique transaction identifier
         date: Transaction date in YYYY-MM-DD format
+        month_key: Transaction month as an integer YYYYMM
         amount: Transaction amount in dollars
         trans_type: 'Income' or 'Expense'
+        type_code: TypeCode matching trans_type
         category: Transaction category
         description: Optional description
     """
     
-    CATEGORIES: Dict[str, List[str]] = {
-        "Income": ["Salary", "Bonus", "Investment", "Other Income"],
-        "Expense": ["Food", "Transport", "Entertainment", "Bills", "Shopping", "Health", "Other Expense"]
-    }
+    # No per-instance __dict__: smaller objects and faster attribute reads
+    __slots__ = (
+        "id", "_date", "month_key", "amount",
+        "_trans_type", "type_code", "category", "description"
+    )
+    
+    # Read-only: shared by every caller, so nobody can append to it by accident
+    CATEGORIES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+        "Income": ("Salary", "Bonus", "Investment", "Other Income"),
+        "Expense": ("Food", "Transport", "Entertainment", "Bills", "Shopping", "Health", "Other Expense")
+    })
+    # Position of each category within its type, for O(1) membership checks
+    CATEGORY_INDEX: Mapping[str, Mapping[str, int]] = MappingProxyType({
+        trans_type: MappingProxyType({name: i for i, name in enumerate(names)})
+        for trans_type, names in CATEGORIES.items()
+    })
     
     def __init__(
         self,
@@ -56,21 +130,56 @@ class Transaction:
             trans_id: Optional transaction ID (auto-generated if not provided)
             
         Raises:
-            ValueError: If amount is negative or invalid
+            ValueError: If amount is negative or invalid, or date is malformed
         """
         self.amount: float = float(amount)
         if self.amount < 0:
             raise ValueError("Amount cannot be negative")
         
-        self.trans_type: str = trans_type
+        self.trans_type = trans_type
         self.category: str = category
         self.description: str = description
-        self.date: str = date or datetime.now().strftime("%Y-%m-%d")
+        self.date = date or _today()
         self.id: str = trans_id or self._generate_id()
     
+    @property
+    def trans_type(self) -> str:
+        """Transaction type name ('Income' or 'Expense')."""
+        return self._trans_type
+    
+    @trans_type.setter
+    def trans_type(self, value: str) -> None:
+        self._trans_type = value
+        self.type_code: TypeCode = TYPE_CODES.get(value, TypeCode.OTHER)
+    
+    @property
+    def date(self) -> str:
+        """Transaction date in YYYY-MM-DD format."""
+        return self._date
+    
+    @date.setter
+    def date(self, value: str) -> None:
+        month_key = parse_month_key(value)
+        self._date = value
+        self.month_key: int = month_key
+    
+    @classmethod
+    def is_known_category(cls, category: str, trans_type: str) -> bool:
+        """
+        Check whether a category is one of the built-in ones for a type.
+        
+        Args:
+            category: Category name
+            trans_type: "Income" or "Expense"
+            
+        Returns:
+            True if category is listed in CATEGORIES for trans_type
+        """
+        return category in cls.CATEGORY_INDEX.get(trans_type, ())
+    
     def _generate_id(self) -> str:
-        """Generate unique ID based on UUID."""
-        return str(uuid.uuid4())
+        """Generate a unique, time-ordered ID from the clock, PID and a counter."""
+        return f"{time.time_ns():x}-{os.getpid():x}-{next(_id_counter):x}"
     
     def to_dict(self) -> Dict[str, any]:
         """
@@ -88,6 +197,28 @@ class Transaction:
             "description": self.description
         }
     
+    def to_csv_fields(self) -> Tuple[str, str, str, str, float, str]:
+        """
+        Get the transaction's CSV columns, ready for csv.writer.
+        
+        Returns:
+            Tuple of (id, date, type, category, amount, description)
+        """
+        return (self.id, self._date, self._trans_type, self.category,
+                self.amount, self.description)
+    
+    def to_csv_line(self) -> str:
+        """
+        Format transaction as one CSV record, identical to what csv.writer
+        produces for to_csv_fields(), line terminator included.
+        
+        Returns:
+            CSV record ending in CRLF
+        """
+        return (f"{_csv_field(self.id)},{_csv_field(self._date)},"
+                f"{_csv_field(self._trans_type)},{_csv_field(self.category)},"
+                f"{self.amount},{_csv_field(self.description)}\r\n")
+    
     def to_csv_row(self) -> str:
         """
         Format transaction as CSV row.
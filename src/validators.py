@@ -8,6 +8,13 @@ import re
 from datetime import datetime
 
 
+# Transaction types, in the order error messages list them
+TRANSACTION_TYPES = ('Income', 'Expense')
+
+# Cheap shape check run before the full calendar check in strptime
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
 class ValidationError(Exception):
     """Raised when validation fails."""
     pass
@@ -16,12 +23,19 @@ class ValidationError(Exception):
 class TransactionValidator:
     """Validates transaction data."""
     
-    VALID_TYPES = ['Income', 'Expense']
+    VALID_TYPES = frozenset(TRANSACTION_TYPES)
     MIN_AMOUNT = 0.01
     MAX_AMOUNT = 1_000_000.00
     DESCRIPTION_MAX_LENGTH = 500
     DATE_FORMAT = '%Y-%m-%d'
     
+    # Error messages, formatted once
+    _ERR_TYPE = f"Invalid type. Must be one of: {', '.join(TRANSACTION_TYPES)}"
+    _ERR_MIN = f"Amount must be at least ${MIN_AMOUNT}"
+    _ERR_MAX = f"Amount cannot exceed ${MAX_AMOUNT}"
+    _ERR_DESCRIPTION = f"Description cannot exceed {DESCRIPTION_MAX_LENGTH} characters"
+    _ERR_DATE_FMT = f"Date must be in format: {DATE_FORMAT}"
+    
     @classmethod
     def validate_transaction(cls, data: Dict[str, Any]) -> Tuple[bool, str]:
         """
@@ -44,15 +58,15 @@ class TransactionValidator:
             
             # Type validation
             if data['type'] not in cls.VALID_TYPES:
-                return False, f"Invalid type. Must be one of: {', '.join(cls.VALID_TYPES)}"
+                return False, cls._ERR_TYPE
             
             # Amount validation
             try:
                 amount = float(data['amount'])
                 if amount < cls.MIN_AMOUNT:
-                    return False, f"Amount must be at least ${cls.MIN_AMOUNT}"
+                    return False, cls._ERR_MIN
                 if amount > cls.MAX_AMOUNT:
-                    return False, f"Amount cannot exceed ${cls.MAX_AMOUNT}"
+                    return False, cls._ERR_MAX
             except (ValueError, TypeError):
                 return False, "Amount must be a valid number"
             
@@ -65,14 +79,17 @@ class TransactionValidator:
                 if not isinstance(data['description'], str):
                     return False, "Description must be a string"
                 if len(data['description']) > cls.DESCRIPTION_MAX_LENGTH:
-                    return False, f"Description cannot exceed {cls.DESCRIPTION_MAX_LENGTH} characters"
+                    return False, cls._ERR_DESCRIPTION
             
             # Date validation (if provided)
-            if 'date' in data and data['date']:
+            date = data.get('date')
+            if date:
+                if not isinstance(date, str) or not DATE_PATTERN.fullmatch(date):
+                    return False, cls._ERR_DATE_FMT
                 try:
-                    datetime.strptime(data['date'], cls.DATE_FORMAT)
+                    datetime.strptime(date, cls.DATE_FORMAT)
                 except ValueError:
-                    return False, f"Date must be in format: {cls.DATE_FORMAT}"
+                    return False, cls._ERR_DATE_FMT
             
             return True, ""
         
@@ -83,6 +100,9 @@ class TransactionValidator:
 class QueryValidator:
     """Validates query parameters."""
     
+    VALID_TYPES = frozenset(TRANSACTION_TYPES)
+    _ERR_TYPE = f"Invalid type filter. Must be one of: {', '.join(TRANSACTION_TYPES)}"
+    
     @classmethod
     def validate_filters(cls, filters: Dict[str, Any]) -> Tuple[bool, str]:
         """
@@ -94,12 +114,10 @@ class QueryValidator:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        valid_types = ['Income', 'Expense']
-        
         # Validate transaction type filter
         if 'type' in filters and filters['type']:
-            if filters['type'] not in valid_types:
-                return False, f"Invalid type filter. Must be one of: {', '.join(valid_types)}"
+            if filters['type'] not in cls.VALID_TYPES:
+                return False, cls._ERR_TYPE
         
         # Validate category filter
         if 'category' in filters and filters['category']:
@@ -107,6 +125,23 @@ class QueryValidator:
                 return False, "Category filter must be a non-empty string"
         
         return True, ""
+    
+    @classmethod
+    def validate_limit(cls, limit: Optional[str]) -> Tuple[bool, str]:
+        """
+        Validate a result limit parameter.
+        
+        Args:
+            limit: Raw limit value (None or empty means no limit)
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        if limit is None or limit == '':
+            return True, ""
+        if not limit.isdecimal() or int(limit) < 1:
+            return False, "Limit must be a positive integer"
+        return True, ""
 
 
 class APIValidator:
@@ -1,149 +1,191 @@
 """Data visualization for budget tracking"""
 
+import os
+from functools import cached_property
 import matplotlib.pyplot as plt
-from typing import List, Dict
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple, Union
 from .transaction import Transaction
-from .analytics import BudgetAnalytics
+from .storage import CSV_DTYPES
 
 
 class BudgetVisualizer:
     """Create charts and visualizations for budget data"""
     
-    def __init__(self, transactions: List[Transaction]):
-        """Initialize with list of transactions"""
-        self.transactions = transactions
-        self.analytics = BudgetAnalytics(transactions)
+    def __init__(self, transactions: Union[List[Transaction], pd.DataFrame]):
+        """
+        Initialize with transactions.
+        
+        Args:
+            transactions: Transaction objects, or a DataFrame shaped like
+                BudgetStorage.get_all_transactions_df() (used as is)
+        """
+        if isinstance(transactions, pd.DataFrame):
+            self.df = transactions
+        else:
+            self.df = pd.DataFrame.from_records(
+                [t.to_csv_fields() for t in transactions], columns=list(CSV_DTYPES)
+            ).astype(CSV_DTYPES)
+    
+    # Aggregates are computed on first use and shared by every plot_* call
+    @cached_property
+    def _expenses_by_category(self) -> pd.Series:
+        """Total expenses per category, largest first"""
+        df = self.df
+        expenses = df.loc[df["Type"] == "Expense"]
+        totals = expenses.groupby("Category", observed=True)["Amount"].sum()
+        return totals.sort_values(ascending=False)
+    
+    @cached_property
+    def _monthly_totals(self) -> pd.DataFrame:
+        """Income and Expense columns per YYYY-MM month, in chronological order"""
+        df = self.df
+        month = df["Date"].str.slice(0, 7)
+        totals = df.groupby([month, "Type"], observed=True)["Amount"].sum().unstack(fill_value=0.0)
+        return totals.reindex(columns=["Income", "Expense"], fill_value=0.0).sort_index()
+    
+    def _axes(self, ax: Optional[Axes], figsize: Tuple[float, float]) -> Axes:
+        """Use the caller's axes, or open a new pyplot figure"""
+        if ax is not None:
+            return ax
+        return plt.figure(figsize=figsize).subplots()
+    
+    def _output(self, ax: Axes, save_path: Optional[str], owned: bool) -> None:
+        """Save or show a finished chart; close its figure if we opened it"""
+        fig = ax.figure
+        if save_path:
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
+            print(f"Chart saved to {save_path}")
+        elif owned:
+            plt.show()
+        if owned:
+            plt.close(fig)
     
-    def plot_expenses_by_category(self, save_path: str = None) -> None:
-        """Create pie chart of expenses by category"""
-        expenses = self.analytics.get_expenses_by_category()
+    def plot_expenses_by_category(self, save_path: str = None,
+                                  ax: Optional[Axes] = None) -> None:
+        """Create pie chart of expenses by category (drawn on ax if given)"""
+        expenses = self._expenses_by_category
         
-        if not expenses:
+        if expenses.empty:
             print("No expense data to visualize.")
             return
         
-        categories = list(expenses.keys())
-        amounts = list(expenses.values())
-        
-        plt.figure(figsize=(10, 6))
-        plt.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90)
-        plt.title("Expenses by Category", fontsize=16, fontweight='bold')
-        plt.axis('equal')
+        owned = ax is None
+        ax = self._axes(ax, (10, 6))
+        ax.pie(expenses.values, labels=expenses.index, autopct='%1.1f%%', startangle=90)
+        ax.set_title("Expenses by Category", fontsize=16, fontweight='bold')
+        ax.axis('equal')
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"Chart saved to {save_path}")
-        else:
-            plt.show()
-        plt.close()
+        self._output(ax, save_path, owned)
     
-    def plot_income_vs_expenses(self, save_path: str = None) -> None:
-        """Create bar chart comparing income and expenses"""
-        monthly = self.analytics.get_monthly_summary()
+    def plot_income_vs_expenses(self, save_path: str = None,
+                                ax: Optional[Axes] = None) -> None:
+        """Create bar chart comparing income and expenses (drawn on ax if given)"""
+        monthly = self._monthly_totals
         
-        if not monthly:
+        if monthly.empty:
             print("No data to visualize.")
             return
         
-        months = list(monthly.keys())
-        income_values = [monthly[m]["income"] for m in months]
-        expense_values = [monthly[m]["expense"] for m in months]
-        
-        x = range(len(months))
+        months = list(monthly.index)
+        x = np.arange(len(months))
         width = 0.35
         
-        plt.figure(figsize=(12, 6))
-        plt.bar([i - width/2 for i in x], income_values, width, label='Income', color='green', alpha=0.7)
-        plt.bar([i + width/2 for i in x], expense_values, width, label='Expenses', color='red', alpha=0.7)
+        owned = ax is None
+        ax = self._axes(ax, (12, 6))
+        ax.bar(x - width/2, monthly["Income"].to_numpy(), width, label='Income', color='green', alpha=0.7)
+        ax.bar(x + width/2, monthly["Expense"].to_numpy(), width, label='Expenses', color='red', alpha=0.7)
         
-        plt.xlabel('Month', fontsize=12)
-        plt.ylabel('Amount ($)', fontsize=12)
-        plt.title('Monthly Income vs Expenses', fontsize=16, fontweight='bold')
-        plt.xticks(x, months, rotation=45)
-        plt.legend()
-        plt.grid(axis='y', alpha=0.3)
-        plt.tight_layout()
+        ax.set_xlabel('Month', fontsize=12)
+        ax.set_ylabel('Amount ($)', fontsize=12)
+        ax.set_title('Monthly Income vs Expenses', fontsize=16, fontweight='bold')
+        ax.set_xticks(x, months, rotation=45)
+        ax.legend()
+        ax.grid(axis='y', alpha=0.3)
+        ax.figure.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"Chart saved to {save_path}")
-        else:
-            plt.show()
-        plt.close()
+        self._output(ax, save_path, owned)
     
-    def plot_monthly_expenses(self, save_path: str = None) -> None:
-        """Create line chart of expenses over time"""
-        monthly = self.analytics.get_monthly_summary()
+    def plot_monthly_expenses(self, save_path: str = None,
+                              ax: Optional[Axes] = None) -> None:
+        """Create line chart of expenses over time (drawn on ax if given)"""
+        monthly = self._monthly_totals
         
-        if not monthly:
+        if monthly.empty:
             print("No data to visualize.")
             return
         
-        months = list(monthly.keys())
-        expenses = [monthly[m]["expense"] for m in months]
+        months = list(monthly.index)
+        expenses = monthly["Expense"].to_numpy()
         
-        plt.figure(figsize=(12, 6))
-        plt.plot(months, expenses, marker='o', linewidth=2, markersize=8, color='red')
-        plt.fill_between(range(len(months)), expenses, alpha=0.3, color='red')
+        owned = ax is None
+        ax = self._axes(ax, (12, 6))
+        ax.plot(months, expenses, marker='o', linewidth=2, markersize=8, color='red')
+        ax.fill_between(range(len(months)), expenses, alpha=0.3, color='red')
         
-        plt.xlabel('Month', fontsize=12)
-        plt.ylabel('Expenses ($)', fontsize=12)
-        plt.title('Monthly Expense Trend', fontsize=16, fontweight='bold')
-        plt.xticks(rotation=45)
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
+        ax.set_xlabel('Month', fontsize=12)
+        ax.set_ylabel('Expenses ($)', fontsize=12)
+        ax.set_title('Monthly Expense Trend', fontsize=16, fontweight='bold')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True, alpha=0.3)
+        ax.figure.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"Chart saved to {save_path}")
-        else:
-            plt.show()
-        plt.close()
+        self._output(ax, save_path, owned)
     
-    def plot_category_trends(self, save_path: str = None) -> None:
-        """Create bar chart of top expense categories"""
-        expenses = self.analytics.get_expenses_by_category()
+    def plot_category_trends(self, save_path: str = None,
+                             ax: Optional[Axes] = None) -> None:
+        """Create bar chart of top expense categories (drawn on ax if given)"""
+        # Get top 5 categories
+        top_categories = self._expenses_by_category.head(5)
         
-        if not expenses:
+        if top_categories.empty:
             print("No expense data to visualize.")
             return
         
-        # Get top 5 categories
-        top_categories = dict(sorted(expenses.items(), key=lambda x: x[1], reverse=True)[:5])
-        categories = list(top_categories.keys())
-        amounts = list(top_categories.values())
+        categories = list(top_categories.index)
+        amounts = top_categories.to_numpy()
         
-        plt.figure(figsize=(10, 6))
-        bars = plt.bar(categories, amounts, color='steelblue', alpha=0.7)
+        owned = ax is None
+        ax = self._axes(ax, (10, 6))
+        bars = ax.bar(categories, amounts, color='steelblue', alpha=0.7)
         
         # Add value labels on bars
         for bar in bars:
             height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height,
+            ax.text(bar.get_x() + bar.get_width()/2., height,
                     f'${height:.2f}',
                     ha='center', va='bottom', fontsize=10)
         
-        plt.xlabel('Category', fontsize=12)
-        plt.ylabel('Amount ($)', fontsize=12)
-        plt.title('Top 5 Expense Categories', fontsize=16, fontweight='bold')
-        plt.xticks(rotation=45, ha='right')
-        plt.grid(axis='y', alpha=0.3)
-        plt.tight_layout()
+        ax.set_xlabel('Category', fontsize=12)
+        ax.set_ylabel('Amount ($)', fontsize=12)
+        ax.set_title('Top 5 Expense Categories', fontsize=16, fontweight='bold')
+        ax.set_xticks(range(len(categories)), categories, rotation=45, ha='right')
+        ax.grid(axis='y', alpha=0.3)
+        ax.figure.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"Chart saved to {save_path}")
-        else:
-            plt.show()
-        plt.close()
+        self._output(ax, save_path, owned)
     
     def generate_all_charts(self, output_dir: str = "data") -> None:
         """Generate all charts and save to directory"""
-        import os
         os.makedirs(output_dir, exist_ok=True)
         
-        self.plot_expenses_by_category(f"{output_dir}/expenses_by_category.png")
-        self.plot_income_vs_expenses(f"{output_dir}/income_vs_expenses.png")
-        self.plot_monthly_expenses(f"{output_dir}/monthly_expenses.png")
-        self.plot_category_trends(f"{output_dir}/category_trends.png")
+        # One off-screen Agg figure, cleared and resized between charts,
+        # instead of a new pyplot figure (and GUI backend) per chart
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        charts = [
+            (self.plot_expenses_by_category, "expenses_by_category.png", (10, 6)),
+            (self.plot_income_vs_expenses, "income_vs_expenses.png", (12, 6)),
+            (self.plot_monthly_expenses, "monthly_expenses.png", (12, 6)),
+            (self.plot_category_trends, "category_trends.png", (10, 6)),
+        ]
+        for plot, filename, figsize in charts:
+            # Fresh axes each time: a pie leaves equal aspect and no frame behind
+            fig.clear()
+            fig.set_size_inches(figsize)
+            plot(f"{output_dir}/{filename}", ax=fig.subplots())
         print(f"\nAll charts generated in {output_dir}/")
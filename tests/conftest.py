@@ -0,0 +1,40 @@
+"""Shared fixtures for budget tracker tests"""
+
+import pytest
+import numpy as np
+
+
+def pytest_addoption(parser):
+    """Add --run-perf to opt in to the slow performance tests"""
+    parser.addoption("--run-perf", action="store_true", default=False,
+                     help="run tests marked perf")
+
+
+def pytest_configure(config):
+    """Register the perf marker"""
+    config.addinivalue_line("markers", "perf: large-N performance test, run with --run-perf")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip perf tests unless --run-perf was given"""
+    if config.getoption("--run-perf"):
+        return
+    skip_perf = pytest.mark.skip(reason="needs --run-perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip_perf)
+
+
+@pytest.fixture(scope="session")
+def sample_transactions_soa():
+    """Sample transactions as read-only parallel arrays, built once per session"""
+    columns = {
+        "amount": np.array([100.00, 50.00, 30.00, 200.00, 75.00], dtype=np.float64),
+        "type": np.array(["Income", "Expense", "Expense", "Income", "Expense"]),
+        "category": np.array(["Salary", "Food", "Transport", "Bonus", "Food"]),
+        "description": np.array(["Monthly", "Lunch", "Gas", "Year-end", "Dinner"]),
+        "date": np.array(["2024-12-01", "2024-12-05", "2024-12-10", "2024-12-15", "2024-12-20"])
+    }
+    for column in columns.values():
+        column.flags.writeable = False
+    return columns
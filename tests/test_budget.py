@@ -1,11 +1,19 @@
 """Unit tests for budget tracker"""
 
 import pytest
+import csv
+import gc
+import io
 import os
-import tempfile
-from src.transaction import Transaction, TransactionType
-from src.storage import BudgetStorage
-from src.analytics import BudgetAnalytics
+import time
+import weakref
+import numpy as np
+import orjson
+from src.transaction import Transaction, TransactionType, TypeCode
+from src.storage import BudgetStorage, CSV_DTYPES
+from src.analytics import BudgetAnalytics, _reduce_numpy, _reduce_columns, _analytics_kernel, njit
+import app as app_module
+from app import create_app
 
 
 class TestTransaction:
@@ -24,6 +32,15 @@ class TestTransaction:
         assert trans.category == "Food"
         assert trans.description == "Lunch"
     
+    def test_transaction_type_code(self):
+        """Test integer type code tracks the transaction type"""
+        trans = Transaction(20.00, "Income", "Bonus")
+        assert trans.type_code == TypeCode.INCOME
+        
+        trans.trans_type = "Expense"
+        assert trans.type_code == TypeCode.EXPENSE
+        assert trans.to_dict()["type"] == "Expense"
+    
     def test_transaction_to_dict(self):
         """Test converting transaction to dictionary"""
         trans = Transaction(
@@ -50,10 +67,51 @@ class TestTransaction:
             date="2024-12-15"
         )
         
-        csv_row = trans.to_csv_row()
-        assert "75.5" in csv_row
-        assert "Expense" in csv_row
-        assert "Transport" in csv_row
+        csv_line = trans.to_csv_line()
+        assert "75.5" in csv_line
+        assert "Expense" in csv_line
+        assert "Transport" in csv_line
+        
+        for description in ("Gas", "Gas, oil", 'The "good" one', "Two\nlines", ""):
+            trans.description = description
+            expected = io.StringIO()
+            csv.writer(expected).writerow(trans.to_csv_fields())
+            assert trans.to_csv_line() == expected.getvalue()
+    
+    def test_transaction_month_key(self):
+        """Test month key is derived from the date"""
+        trans = Transaction(50.00, "Expense", "Food", date="2024-12-15")
+        assert trans.month_key == 202412
+        
+        trans.date = "2025-01-03"
+        assert trans.month_key == 202501
+        
+        with pytest.raises(ValueError):
+            Transaction(50.00, "Expense", "Food", date="15/12/2024")
+    
+    def test_transaction_uses_slots(self):
+        """Test transactions carry no per-instance __dict__"""
+        trans = Transaction(50.00, "Expense", "Food")
+        assert not hasattr(trans, "__dict__")
+        
+        with pytest.raises(AttributeError):
+            trans.notes = "not a field"
+    
+    def test_transaction_ids(self):
+        """Test generated IDs are unique and supplied IDs are kept"""
+        ids = [Transaction(1.00, "Expense", "Food").id for _ in range(1000)]
+        assert len(set(ids)) == len(ids)
+        
+        trans = Transaction(1.00, "Expense", "Food", trans_id="abc")
+        assert trans.id == "abc"
+    
+    def test_categories_are_read_only(self):
+        """Test the built-in category table cannot be modified"""
+        with pytest.raises(TypeError):
+            Transaction.CATEGORIES["Expense"] = ("Anything",)
+        assert Transaction.is_known_category("Food", "Expense")
+        assert not Transaction.is_known_category("Food", "Income")
+        assert not Transaction.is_known_category("Food", "Other")
     
     def test_transaction_default_date(self):
         """Test transaction defaults to today's date"""
@@ -71,12 +129,15 @@ class TestTransaction:
 class TestBudgetStorage:
     """Test BudgetStorage"""
     
+    @pytest.fixture(scope="module")
+    def storage_dir(self, tmp_path_factory):
+        """One temporary directory for every storage test; pytest reaps it"""
+        return tmp_path_factory.mktemp("storage")
+    
     @pytest.fixture
-    def temp_storage(self):
-        """Create temporary storage for testing"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            storage = BudgetStorage(os.path.join(tmpdir, "test.csv"))
-            yield storage
+    def temp_storage(self, storage_dir, request):
+        """Create temporary storage for testing, in a file named after the test"""
+        return BudgetStorage(str(storage_dir / f"{request.node.name}.csv"))
     
     def test_storage_file_creation(self, temp_storage):
         """Test that storage creates CSV file"""
@@ -96,54 +157,121 @@ class TestBudgetStorage:
         assert len(transactions) == 1
         assert transactions[0].amount == 50.00
     
+    def test_add_transactions_batch(self, temp_storage):
+        """Test adding several transactions in one call"""
+        version = temp_storage.version
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Food") for amount in (10.00, 20.00, 30.00)
+        )
+        
+        assert temp_storage.version == version + 1
+        assert len(temp_storage.get_transactions_by_category("Food")) == 3
+        assert len(BudgetStorage(temp_storage.data_path).get_all_transactions()) == 3
+    
+    def test_description_with_comma_round_trips(self, temp_storage):
+        """Test descriptions containing commas survive a reload"""
+        temp_storage.add_transaction(Transaction(12.345, "Expense", "Food", "Bread, milk"))
+        
+        reloaded = BudgetStorage(temp_storage.data_path).get_all_transactions()
+        assert reloaded[0].description == "Bread, milk"
+        assert reloaded[0].amount == 12.345
+        assert temp_storage.get_all_transactions_df()["Description"][0] == "Bread, milk"
+    
+    def test_non_ascii_description_stored_as_utf8(self, temp_storage):
+        """Test the CSV is UTF-8 regardless of locale, so both read paths agree"""
+        temp_storage.add_transaction(Transaction(4.50, "Expense", "Food", "Café crème"))
+        
+        with open(temp_storage.data_path, "rb") as f:
+            assert "Café crème".encode("utf-8") in f.read()
+        assert BudgetStorage(temp_storage.data_path).get_all_transactions()[0].description == "Café crème"
+        assert temp_storage.get_all_transactions_df()["Description"][0] == "Café crème"
+    
     def test_get_all_transactions(self, temp_storage):
         """Test retrieving all transactions"""
-        trans1 = Transaction(50.00, "Expense", "Food", "Lunch")
-        trans2 = Transaction(100.00, "Income", "Salary", "Monthly")
-        
-        temp_storage.add_transaction(trans1)
-        temp_storage.add_transaction(trans2)
+        temp_storage.add_transactions([
+            Transaction(50.00, "Expense", "Food", "Lunch"),
+            Transaction(100.00, "Income", "Salary", "Monthly")
+        ])
         
         transactions = temp_storage.get_all_transactions()
         assert len(transactions) == 2
     
-    def test_get_transactions_by_type(self, temp_storage):
-        """Test filtering by transaction type"""
-        trans1 = Transaction(50.00, "Expense", "Food")
-        trans2 = Transaction(100.00, "Income", "Salary")
-        trans3 = Transaction(75.00, "Expense", "Transport")
+    @pytest.mark.parametrize("method,field,arg,expected", [
+        ("get_transactions_by_type", "trans_type", "Expense", 2),
+        ("get_transactions_by_type", "trans_type", "Income", 1),
+        ("get_transactions_by_category", "category", "Food", 2),
+    ])
+    def test_get_transactions_filtered(self, temp_storage, method, field, arg, expected):
+        """Test filtering by transaction type and by category"""
+        temp_storage.add_transactions([
+            Transaction(50.00, "Expense", "Food"),
+            Transaction(100.00, "Income", "Salary"),
+            Transaction(40.00, "Expense", "Food")
+        ])
         
-        temp_storage.add_transaction(trans1)
-        temp_storage.add_transaction(trans2)
-        temp_storage.add_transaction(trans3)
+        found = getattr(temp_storage, method)(arg)
+        assert len(found) == expected
+        assert {getattr(t, field) for t in found} == {arg}
+    
+    def test_query_combined_filters(self, temp_storage):
+        """Test querying by type and category together"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food", "Lunch"))
+        temp_storage.add_transaction(Transaction(100.00, "Income", "Salary"))
+        temp_storage.add_transaction(Transaction(40.00, "Expense", "Food", "Dinner"))
+        temp_storage.add_transaction(Transaction(20.00, "Expense", "Transport"))
+        
+        food = temp_storage.query(trans_type="Expense", category="Food")
+        assert [t.description for t in food] == ["Lunch", "Dinner"]
+        assert temp_storage.query(trans_type="Income", category="Food") == []
+        assert len(temp_storage.query()) == 4
+    
+    def test_query_json(self, temp_storage):
+        """Test JSON listings match to_dict() and drop deleted rows"""
+        temp_storage.add_transactions([
+            Transaction(50.00, "Expense", "Food", "Lunch"),
+            Transaction(100.00, "Income", "Salary")
+        ])
+        transactions = temp_storage.get_all_transactions()
+        
+        assert orjson.loads(temp_storage.query_json()) == [t.to_dict() for t in transactions]
+        assert orjson.loads(temp_storage.query_json(trans_type="Income")) == [transactions[1].to_dict()]
+        assert temp_storage.query_json(category="Bills") == b"[]"
         
-        expenses = temp_storage.get_transactions_by_type("Expense")
-        assert len(expenses) == 2
+        temp_storage.delete_transaction(transactions[0].id)
+        assert orjson.loads(temp_storage.query_json()) == [transactions[1].to_dict()]
+    
+    def test_get_transactions_by_date(self, temp_storage):
+        """Test filtering by date, alone and with other filters"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food", "Lunch", "2024-12-05"))
+        temp_storage.add_transaction(Transaction(100.00, "Income", "Salary", "", "2024-12-05"))
+        temp_storage.add_transaction(Transaction(40.00, "Expense", "Food", "Dinner", "2024-12-06"))
         
-        income = temp_storage.get_transactions_by_type("Income")
-        assert len(income) == 1
+        assert len(temp_storage.get_transactions_by_date("2024-12-05")) == 2
+        assert temp_storage.get_transactions_by_date("2024-01-01") == []
+        food = temp_storage.query(category="Food", date="2024-12-06")
+        assert [t.description for t in food] == ["Dinner"]
     
-    def test_get_transactions_by_category(self, temp_storage):
-        """Test filtering by category"""
-        trans1 = Transaction(50.00, "Expense", "Food")
-        trans2 = Transaction(100.00, "Income", "Salary")
-        trans3 = Transaction(40.00, "Expense", "Food")
+    def test_get_all_transactions_df(self, temp_storage):
+        """Test the DataFrame view matches the stored transactions"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food", "Lunch", "2024-12-05"))
+        temp_storage.add_transaction(Transaction(100.00, "Income", "Salary", "", "2024-12-01"))
         
-        temp_storage.add_transaction(trans1)
-        temp_storage.add_transaction(trans2)
-        temp_storage.add_transaction(trans3)
+        df = temp_storage.get_all_transactions_df()
+        assert list(df["ID"]) == [t.id for t in temp_storage.get_all_transactions()]
+        assert list(df["Amount"]) == [50.00, 100.00]
+        assert list(df["Description"]) == ["Lunch", ""]
+        assert str(df["Category"].dtype) == "category"
+        assert temp_storage.get_all_transactions_df() is df
         
-        food_trans = temp_storage.get_transactions_by_category("Food")
-        assert len(food_trans) == 2
-        assert all(t.category == "Food" for t in food_trans)
+        temp_storage.delete_transaction(df["ID"][0])
+        assert list(temp_storage.get_all_transactions_df()["Type"]) == ["Income"]
     
     def test_delete_transaction(self, temp_storage):
         """Test deleting a transaction"""
-        trans1 = Transaction(50.00, "Expense", "Food")
-        trans2 = Transaction(100.00, "Income", "Salary")
-        
-        temp_storage.add_transaction(trans1)
-        temp_storage.add_transaction(trans2)
+        temp_storage.add_transactions([
+            Transaction(50.00, "Expense", "Food"),
+            Transaction(100.00, "Income", "Salary")
+        ])
         
         transactions = temp_storage.get_all_transactions()
         trans_id = transactions[0].id
@@ -154,6 +282,207 @@ class TestBudgetStorage:
         remaining = temp_storage.get_all_transactions()
         assert len(remaining) == 1
     
+    def test_delete_uses_tombstones_until_compaction(self, temp_storage):
+        """Test deletes append tombstones and only compact past the threshold"""
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Food") for amount in (10.00, 20.00, 30.00, 40.00, 50.00)
+        )
+        ids = [t.id for t in temp_storage.get_all_transactions()]
+        
+        def csv_rows():
+            with open(temp_storage.data_path) as f:
+                return len(f.readlines()) - 1
+        
+        assert temp_storage.delete_transaction(ids[0])
+        assert csv_rows() == 5
+        reopened = BudgetStorage(temp_storage.data_path)
+        assert [t.id for t in reopened.get_all_transactions()] == ids[1:]
+        
+        assert temp_storage.delete_transaction(ids[1])
+        assert csv_rows() == 3
+        assert not os.path.exists(temp_storage.tombstone_path)
+        storage_dir = os.path.dirname(temp_storage.data_path)
+        assert not [name for name in os.listdir(storage_dir) if name.endswith(".tmp")]
+        assert len(BudgetStorage(temp_storage.data_path).get_all_transactions()) == 3
+    
+    def test_failed_rewrite_removes_temp_file(self, temp_storage, monkeypatch):
+        """Test a failed rewrite keeps the CSV and leaves no temp file behind"""
+        temp_storage.add_transaction(Transaction(10.00, "Expense", "Food"))
+        
+        def fail(fd):
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(os, "fsync", fail)
+        with pytest.raises(OSError):
+            temp_storage.clear_all()
+        monkeypatch.undo()
+        
+        storage_dir = os.path.dirname(temp_storage.data_path)
+        assert not [name for name in os.listdir(storage_dir) if name.endswith(".tmp")]
+        assert len(BudgetStorage(temp_storage.data_path).get_all_transactions()) == 1
+    
+    def test_analytics_rebuilt_after_mutation(self, temp_storage):
+        """Test cached analytics are reused until the data changes"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food"))
+        analytics = temp_storage.get_analytics()
+        assert temp_storage.get_analytics() is analytics
+        
+        temp_storage.add_transaction(Transaction(25.00, "Expense", "Food"))
+        assert temp_storage.get_analytics() is not analytics
+        assert temp_storage.get_analytics().get_total_expense() == 75.00
+    
+    def test_reloads_after_external_write(self, temp_storage):
+        """Test changes written by another storage instance are picked up"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food"))
+        assert len(temp_storage.get_all_transactions()) == 1
+        version = temp_storage.current_version()
+        
+        other = BudgetStorage(temp_storage.data_path)
+        other.add_transaction(Transaction(25.00, "Expense", "Transport"))
+        
+        assert temp_storage.current_version() > version
+        assert len(temp_storage.get_transactions_by_category("Transport")) == 1
+        assert temp_storage.get_analytics().get_total_expense() == 75.00
+    
+    def test_add_reloads_after_concurrent_append(self, temp_storage, monkeypatch):
+        """Test a row appended elsewhere mid-add is loaded, not marked as seen"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food"))
+        other = BudgetStorage(temp_storage.data_path)
+        appender = temp_storage._appender
+        
+        def racing_appender():
+            other.add_transaction(Transaction(25.00, "Expense", "Transport"))
+            return appender()
+        
+        monkeypatch.setattr(temp_storage, "_appender", racing_appender)
+        temp_storage.add_transaction(Transaction(10.00, "Expense", "Bills"))
+        
+        categories = [t.category for t in temp_storage.get_all_transactions()]
+        assert sorted(categories) == ["Bills", "Food", "Transport"]
+        assert temp_storage.get_analytics().get_total_expense() == 85.00
+    
+    def test_delete_reloads_after_concurrent_delete(self, temp_storage, monkeypatch):
+        """Test a row deleted elsewhere mid-delete is dropped from memory too"""
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Food") for amount in (10.00, 20.00, 30.00, 40.00, 50.00)
+        )
+        ids = [t.id for t in temp_storage.get_all_transactions()]
+        other = BudgetStorage(temp_storage.data_path)
+        load = temp_storage._load
+        
+        def racing_load():
+            transactions = load()
+            other.delete_transaction(ids[1])
+            return transactions
+        
+        monkeypatch.setattr(temp_storage, "_load", racing_load)
+        assert temp_storage.delete_transaction(ids[0])
+        monkeypatch.undo()
+        
+        assert [t.id for t in temp_storage.get_all_transactions()] == ids[2:]
+        assert temp_storage.get_analytics().get_total_expense() == 120.00
+    
+    def test_compaction_keeps_concurrent_append(self, temp_storage, monkeypatch):
+        """Test a row appended elsewhere while compacting is not overwritten"""
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Food") for amount in (10.00, 20.00, 30.00, 40.00)
+        )
+        ids = [t.id for t in temp_storage.get_all_transactions()]
+        assert temp_storage.delete_transaction(ids[0])
+        other = BudgetStorage(temp_storage.data_path)
+        write_temp_csv = temp_storage._write_temp_csv
+        
+        def racing_write(rows):
+            other.add_transaction(Transaction(5.00, "Expense", "Bills"))
+            return write_temp_csv(rows)
+        
+        monkeypatch.setattr(temp_storage, "_write_temp_csv", racing_write)
+        assert temp_storage.delete_transaction(ids[1])
+        monkeypatch.undo()
+        
+        categories = [t.category for t in temp_storage.get_all_transactions()]
+        assert sorted(categories) == ["Bills", "Food", "Food"]
+        reopened = BudgetStorage(temp_storage.data_path)
+        assert reopened.get_analytics().get_total_expense() == 75.00
+        storage_dir = os.path.dirname(temp_storage.data_path)
+        assert not [name for name in os.listdir(storage_dir) if name.endswith(".tmp")]
+    
+    def test_compaction_keeps_concurrent_tombstone(self, temp_storage, monkeypatch):
+        """Test a delete recorded elsewhere while compacting is not undone"""
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Food") for amount in (10.00, 20.00, 30.00, 40.00)
+        )
+        ids = [t.id for t in temp_storage.get_all_transactions()]
+        assert temp_storage.delete_transaction(ids[0])
+        write_temp_csv = temp_storage._write_temp_csv
+        
+        def racing_write(rows):
+            # What another worker's delete_transaction appends
+            with open(temp_storage.tombstone_path, "a", newline="", encoding="utf-8") as f:
+                f.write(f"{ids[2]}\n")
+            return write_temp_csv(rows)
+        
+        monkeypatch.setattr(temp_storage, "_write_temp_csv", racing_write)
+        assert temp_storage.delete_transaction(ids[1])
+        monkeypatch.undo()
+        
+        assert [t.id for t in temp_storage.get_all_transactions()] == ids[3:]
+        reopened = BudgetStorage(temp_storage.data_path)
+        assert [t.id for t in reopened.get_all_transactions()] == ids[3:]
+    
+    def test_malformed_row_is_skipped(self, temp_storage):
+        """Test one unparseable row is skipped at load and kept in the file"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food"))
+        with open(temp_storage.data_path, "a", newline="", encoding="utf-8") as f:
+            f.write("bad,12/01/2024,Expense,Food,20.0,Hand edited\r\n")
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Transport") for amount in (1.00, 2.00, 3.00)
+        )
+        
+        transactions = temp_storage.get_all_transactions()
+        assert len(transactions) == 4
+        assert temp_storage.get_analytics().get_total_expense() == 56.00
+        
+        # Deleting past the compaction threshold must not rewrite the bad row away
+        for trans in transactions[:2]:
+            assert temp_storage.delete_transaction(trans.id)
+        assert not os.path.exists(temp_storage.tombstone_path)
+        with open(temp_storage.data_path, encoding="utf-8") as f:
+            assert "12/01/2024" in f.read()
+    
+    @pytest.mark.parametrize("bad_row", [
+        "bad,12/01/2024,Expense,Food,20.0,Hand edited\r\n",
+        "bad,2024-12-01,Expense,Food,-20.0,Negative\r\n",
+        "bad,2024-12-01,Expense,Food,abc,Not a number\r\n",
+    ])
+    def test_malformed_row_is_skipped_in_dataframe(self, temp_storage, bad_row):
+        """Test the DataFrame skips the same unparseable rows as the objects"""
+        temp_storage.add_transaction(Transaction(50.00, "Expense", "Food"))
+        with open(temp_storage.data_path, "a", newline="", encoding="utf-8") as f:
+            f.write(bad_row)
+        temp_storage.add_transactions(
+            Transaction(amount, "Expense", "Transport") for amount in (1.00, 2.00, 3.00)
+        )
+        temp_storage.delete_transaction(temp_storage.get_all_transactions()[1].id)
+        
+        df = temp_storage.get_all_transactions_df()
+        transactions = temp_storage.get_all_transactions()
+        assert list(df["ID"]) == [t.id for t in transactions]
+        assert df["Amount"].sum() == 55.00
+        assert df.dtypes.astype(str).to_dict() == CSV_DTYPES
+    
+    def test_storage_can_be_garbage_collected(self, temp_storage):
+        """Test an unreferenced storage is freed and its append handle closed"""
+        storage = BudgetStorage(temp_storage.data_path)
+        storage.add_transaction(Transaction(50.00, "Expense", "Food"))
+        handle = storage._append_file
+        ref = weakref.ref(storage)
+        
+        del storage
+        gc.collect()
+        assert ref() is None
+        assert handle.closed
+    
     def test_delete_nonexistent_transaction(self, temp_storage):
         """Test deleting a transaction that doesn't exist"""
         success = temp_storage.delete_transaction("nonexistent")
@@ -163,66 +492,199 @@ class TestBudgetStorage:
 class TestBudgetAnalytics:
     """Test BudgetAnalytics"""
     
-    @pytest.fixture
-    def sample_transactions(self):
-        """Create sample transactions for testing"""
-        return [
-            Transaction(100.00, "Income", "Salary", "Monthly", "2024-12-01"),
-            Transaction(50.00, "Expense", "Food", "Lunch", "2024-12-05"),
-            Transaction(30.00, "Expense", "Transport", "Gas", "2024-12-10"),
-            Transaction(200.00, "Income", "Bonus", "Year-end", "2024-12-15"),
-            Transaction(75.00, "Expense", "Food", "Dinner", "2024-12-20"),
-        ]
-    
-    def test_total_income(self, sample_transactions):
+    @pytest.fixture(scope="module")
+    def sample_transactions(self, sample_transactions_soa):
+        """Create sample transactions for testing (a tuple, shared by the module)"""
+        soa = sample_transactions_soa
+        return tuple(
+            Transaction(amount, trans_type, category, description, date)
+            for amount, trans_type, category, description, date in zip(
+                soa["amount"].tolist(), soa["type"].tolist(), soa["category"].tolist(),
+                soa["description"].tolist(), soa["date"].tolist()
+            )
+        )
+    
+    @pytest.fixture(scope="module", params=["objects", "arrays"])
+    def analytics(self, request, sample_transactions, sample_transactions_soa):
+        """Analytics over the sample transactions, from objects and from column arrays"""
+        if request.param == "objects":
+            return BudgetAnalytics(sample_transactions)
+        soa = sample_transactions_soa
+        return BudgetAnalytics.from_arrays(soa["amount"], soa["type"], soa["category"], soa["date"])
+    
+    def test_total_income(self, analytics):
         """Test total income calculation"""
-        analytics = BudgetAnalytics(sample_transactions)
         assert analytics.get_total_income() == 300.00
     
-    def test_total_expense(self, sample_transactions):
+    def test_total_expense(self, analytics):
         """Test total expense calculation"""
-        analytics = BudgetAnalytics(sample_transactions)
         assert analytics.get_total_expense() == 155.00
     
-    def test_balance(self, sample_transactions):
+    def test_balance(self, analytics):
         """Test balance calculation"""
-        analytics = BudgetAnalytics(sample_transactions)
         assert analytics.get_balance() == 145.00
     
-    def test_expenses_by_category(self, sample_transactions):
+    def test_expenses_by_category(self, analytics):
         """Test expenses grouped by category"""
-        analytics = BudgetAnalytics(sample_transactions)
         expenses = analytics.get_expenses_by_category()
         
         assert expenses["Food"] == 125.00
         assert expenses["Transport"] == 30.00
     
-    def test_income_by_category(self, sample_transactions):
+    def test_expenses_by_category_limit(self, analytics):
+        """Test only the largest categories are returned when limited"""
+        assert analytics.get_expenses_by_category(limit=1) == {"Food": 125.00}
+        assert list(analytics.get_expenses_by_category(sort=False)) == ["Food", "Transport"]
+        assert list(analytics.get_income_by_category(sort=False)) == ["Salary", "Bonus"]
+        assert list(analytics.get_income_by_category(limit=5)) == ["Bonus", "Salary"]
+    
+    def test_income_by_category(self, analytics):
         """Test income grouped by category"""
-        analytics = BudgetAnalytics(sample_transactions)
         income = analytics.get_income_by_category()
         
         assert income["Salary"] == 100.00
         assert income["Bonus"] == 200.00
     
-    def test_monthly_summary(self, sample_transactions):
+    def test_monthly_summary(self, analytics):
         """Test monthly breakdown"""
-        analytics = BudgetAnalytics(sample_transactions)
         monthly = analytics.get_monthly_summary()
         
         assert "2024-12" in monthly
         assert monthly["2024-12"]["income"] == 300.00
         assert monthly["2024-12"]["expense"] == 155.00
     
+    def test_monthly_summary_spans_years(self):
+        """Test months are ordered across years and empty months are skipped"""
+        analytics = BudgetAnalytics([
+            Transaction(10.00, "Expense", "Food", date="2025-02-01"),
+            Transaction(20.00, "Income", "Salary", date="2024-11-30"),
+        ])
+        monthly = analytics.get_monthly_summary()
+        
+        assert BudgetAnalytics.from_arrays(
+            [10.00, 20.00], ["Expense", "Income"], ["Food", "Salary"], ["2025-02-01", "2024-11-30"]
+        ).get_monthly_summary() == monthly
+        assert list(monthly) == ["2024-11", "2025-02"]
+        assert monthly["2025-02"] == {"income": 0.0, "expense": 10.00}
+        
+        months, income, expense = analytics.get_monthly_series()
+        assert months == ["2024-11", "2025-02"]
+        np.testing.assert_allclose(income, [20.00, 0.0])
+        np.testing.assert_allclose(expense, [0.0, 10.00])
+    
+    def test_aggregates_refresh_when_list_grows(self, sample_transactions):
+        """Test cached aggregates are recomputed after the list changes"""
+        transactions = list(sample_transactions)
+        analytics = BudgetAnalytics(transactions)
+        assert analytics.get_total_expense() == 155.00
+        
+        transactions.append(Transaction(45.00, "Expense", "Food", "Snack", "2025-01-02"))
+        assert analytics.get_total_expense() == 200.00
+        assert analytics.get_expenses_by_category()["Food"] == 170.00
+        assert analytics.get_monthly_summary()["2025-01"]["expense"] == 45.00
+    
+    @staticmethod
+    def columns(analytics):
+        """The column arrays and sizes the reduction functions take"""
+        analytics.get_total_income()
+        return (analytics._amt, analytics._ttype, analytics._cat, analytics._month,
+                len(analytics._categories), len(analytics._months))
+    
+    def test_loop_kernel_matches_numpy(self, analytics):
+        """Test the (uncompiled) loop kernel and NumPy reductions agree"""
+        columns = self.columns(analytics)
+        
+        for expected, actual in zip(_reduce_numpy(*columns), _analytics_kernel(*columns)):
+            assert np.allclose(expected, actual)
+    
+    @pytest.mark.skipif(njit is None, reason="numba is not installed")
+    def test_compiled_kernel_matches_numpy(self, analytics):
+        """Test the Numba-compiled kernel and NumPy reductions agree"""
+        columns = self.columns(analytics)
+        
+        for expected, actual in zip(_reduce_numpy(*columns), _reduce_columns(*columns)):
+            assert np.allclose(expected, actual)
+    
+    @pytest.mark.perf
+    def test_analytics_100k(self):
+        """Test aggregating 100k transactions stays within a linear-time budget"""
+        # Warm up so a compiled kernel's first-call cost is not measured
+        BudgetAnalytics([Transaction(1.00, "Expense", "Food", date="2024-01-01")]).get_total_expense()
+        analytics = BudgetAnalytics([
+            Transaction(1.00, "Expense", f"Category {i % 50}", date=f"2024-{i % 12 + 1:02d}-01")
+            for i in range(100_000)
+        ])
+        
+        start = time.perf_counter()
+        assert analytics.get_total_expense() == 100_000.00
+        assert len(analytics.get_expenses_by_category()) == 50
+        assert len(analytics.get_monthly_summary()) == 12
+        assert time.perf_counter() - start < 0.5
+    
     def test_empty_transactions(self):
         """Test analytics with empty transaction list"""
         analytics = BudgetAnalytics([])
         
+        assert BudgetAnalytics.from_arrays([], [], [], []).get_monthly_summary() == {}
         assert analytics.get_total_income() == 0.0
         assert analytics.get_total_expense() == 0.0
         assert analytics.get_balance() == 0.0
         assert len(analytics.get_expenses_by_category()) == 0
 
 
+
+class TestAPI:
+    """Test the Flask API's response caching and chart rendering"""
+    
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Create a test client whose data directory is a temporary one"""
+        monkeypatch.chdir(tmp_path)
+        return create_app('testing').test_client()
+    
+    @staticmethod
+    def add(client, category, amount):
+        """POST an expense and check it was created"""
+        response = client.post('/api/transactions', json={
+            'type': 'Expense', 'category': category, 'amount': amount, 'date': '2024-12-01'
+        })
+        assert response.status_code == 201
+    
+    def test_custom_category_accepted(self, client):
+        """Test categories outside the built-in list are still accepted"""
+        self.add(client, 'Pets', 12.00)
+        assert client.get('/api/transactions?category=Pets').get_json()[0]['amount'] == 12.00
+    
+    def test_chart_cache_invalidated_after_mutation(self, client):
+        """Test cached summary and chart responses are replaced after a write"""
+        self.add(client, 'Food', 50.00)
+        pie = client.get('/api/charts/expenses-pie')
+        assert pie.mimetype == 'image/png'
+        assert client.get('/api/charts/expenses-pie').data == pie.data
+        
+        self.add(client, 'Transport', 20.00)
+        summary = client.get('/api/summary').get_json()
+        assert set(summary['expenses_by_category']) == {'Food', 'Transport'}
+        assert client.get('/api/charts/expenses-pie').data != pie.data
+        
+        trans_id = client.get('/api/transactions').get_json()[0]['id']
+        assert client.delete(f'/api/transactions/{trans_id}').status_code == 200
+        assert client.get('/api/charts/expenses-pie').data != pie.data
+        assert set(client.get('/api/summary').get_json()['expenses_by_category']) == {'Transport'}
+    
+    def test_superseded_chart_renders_are_skipped(self, client, monkeypatch):
+        """Test a burst of writes does not queue one chart render per write"""
+        renders = []
+        render = app_module.render_expense_pie
+        monkeypatch.setattr(app_module, 'render_expense_pie',
+                            lambda expenses: renders.append(expenses) or render(expenses))
+        
+        for amount in range(1, 21):
+            self.add(client, 'Food', float(amount))
+        assert client.get('/api/charts/expenses-pie').status_code == 200
+        assert renders[-1] == {'Food': 210.00}
+        assert len(renders) < 10
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])